@@ -0,0 +1,231 @@
+"""
+Offline-Benchmark für die Command-Handler aus bot.py.
+
+Läuft komplett lokal gegen fakediscord.py (simulierte Latenz + 429s) und
+meldet Durchsatz, p50/p99-Latenz und API-Calls pro Command.
+
+Nutzung:
+    python bench.py --drivers 60 --tracks 5 --users 20 --commands 300
+    python bench.py --no-rate-limits --latency 0   (reine Handler-Kosten)
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import fakediscord
+from fakediscord import FakeAPI, FakeChannel, FakeContext, FakeGuild, FakeInteraction, FakeUser
+
+
+async def no_artwork(url):
+    return None
+
+
+def load_bot(workdir, cards=False):
+    # bot.py schreibt data.json / data.journal ins aktuelle Verzeichnis
+    os.chdir(workdir)
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ["LEADERBOARD_CARDS"] = "1" if cards else "0"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import bot
+    # offline: Karten ohne Trackbild rendern statt es herunterzuladen
+    bot.card_cache.artwork = no_artwork
+    return bot
+
+
+async def become_leader(bot):
+    # wie on_ready: Lease (im workdir) über leader_loop holen und verlängern,
+    # damit auch der Fencing-Pfad (leading()) gemessen wird
+    bot.leader_task = asyncio.create_task(bot.leader_loop())
+    while not bot.leading():
+        await asyncio.sleep(0.01)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def random_time(rng):
+    return f"{rng.randint(1, 2)}:{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}"
+
+
+class Bench:
+    def __init__(self, bot, api, args):
+        self.bot = bot
+        self.api = api
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+        self.guild = FakeGuild()
+        self.channel = FakeChannel(api, self.guild)
+        self.channels = [self.channel] + [FakeChannel(api, self.guild) for _ in range(args.channels - 1)]
+        self.lb_channel = FakeChannel(api, self.guild)
+
+        # Fahrer: ein Teil ist nicht im Member-Cache -> fetch_user nötig
+        self.drivers = []
+        for i in range(args.drivers):
+            user = FakeUser(10_000 + i, f"Driver{i}")
+            api.users[user.id] = user
+            if self.rng.random() >= args.uncached:
+                self.guild.members[user.id] = user
+            self.drivers.append(user)
+
+        self.owner = FakeUser(bot.BOT_OWNER_ID, "Owner")
+        self.tracks = bot.tracks.names()[:args.tracks]
+        self.race_posts = []
+
+    async def timed(self, name, coro):
+        token = fakediscord.current_command.set(name)
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            self.errors[name] += 1
+            if self.args.verbose:
+                print(f"{name}: {type(e).__name__}: {e}")
+        finally:
+            self.latencies[name].append(time.perf_counter() - start)
+            fakediscord.current_command.reset(token)
+
+    def ctx(self, author, text, command, channel=None):
+        return FakeContext(self.api, channel or self.channel, author, text, command)
+
+    async def setup(self):
+        bot = self.bot
+        await bot.setup_hook()
+        await become_leader(bot)
+
+        # Boards ohne API-Calls anlegen (kein Teil der Messung)
+        data = bot.guild_data(self.guild.id)
+        for track in self.tracks:
+            msg = self.lb_channel.post(self.api.bot_user, embeds=[])
+            data.leaderboard_messages[track] = {"channel_id": self.lb_channel.id, "message_id": msg.id}
+
+        for track in self.tracks:
+            ctx = self.ctx(self.owner, f"!race 01.01.2030 20:00 {track}", "race")
+            await self.timed("race", bot.race.callback(ctx, "01.01.2030", "20:00", track=track))
+
+        self.race_posts = [
+            m for m in self.channel.messages.values() if str(m.id) in data.race_events
+        ]
+
+    async def one_command(self):
+        bot = self.bot
+        roll = self.rng.random()
+        driver = self.rng.choice(self.drivers)
+        track = self.rng.choice(self.tracks)
+
+        if roll < 0.7:
+            args = f"{track} | {random_time(self.rng)}"
+            ctx = self.ctx(driver, f"!hotlap {args}", "hotlap", self.rng.choice(self.channels))
+            await self.timed("hotlap", bot.hotlap.callback(ctx, args=args))
+        elif roll < 0.85:
+            ctx = self.ctx(driver, f"!leaderboard {track}", "leaderboard", self.rng.choice(self.channels))
+            await self.timed("leaderboard", bot.leaderboard.callback(ctx, track=track))
+        elif self.race_posts:
+            post = self.rng.choice(self.race_posts)
+            button = self.rng.choice(bot.rsvp_view.children)
+            interaction = FakeInteraction(self.api, post, driver)
+            await self.timed("rsvp", button.callback(interaction))
+
+    async def user_loop(self, count):
+        for _ in range(count):
+            await self.one_command()
+
+    async def run(self):
+        args = self.args
+        await self.setup()
+
+        per_user = max(1, args.commands // args.users)
+        start = time.perf_counter()
+        await asyncio.gather(*(self.user_loop(per_user) for _ in range(args.users)))
+        await self.bot.board_refresher.flush()
+        await self.bot.rsvp_refresher.flush()
+        elapsed = time.perf_counter() - start
+
+        ctx = self.ctx(self.owner, "!cleanup_events", "cleanup_events")
+        await self.timed("cleanup_events", self.bot.cleanup_events.callback(ctx, filters=""))
+
+        # offene Scheduler-Jobs etc. verwerfen
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+
+        return elapsed
+
+    def report(self, elapsed):
+        total = sum(len(v) for k, v in self.latencies.items() if k not in ("race", "cleanup_events"))
+        print(
+            f"drivers={self.args.drivers} tracks={len(self.tracks)} users={self.args.users} "
+            f"latency={self.args.latency * 1000:.0f}ms"
+        )
+        print(f"{total} commands in {elapsed:.2f}s -> {total / elapsed:.1f} cmd/s\n")
+
+        print(f"{'command':<16}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}{'api/cmd':>10}{'429s':>7}{'errors':>8}")
+        for name, values in sorted(self.latencies.items()):
+            print(
+                f"{name:<16}{len(values):>6}"
+                f"{percentile(values, 50) * 1000:>10.1f}"
+                f"{percentile(values, 99) * 1000:>10.1f}"
+                f"{self.api.calls[name] / len(values):>10.2f}"
+                f"{self.api.ratelimited[name]:>7}"
+                f"{self.errors[name]:>8}"
+            )
+
+        print(f"\nbackground api calls: {self.api.calls['background']}")
+        print("api calls by route: " + ", ".join(f"{r}={n}" for r, n in sorted(self.api.routes.items())))
+        print(
+            f"board refresher: {self.bot.board_refresher.edits} edits, "
+            f"{self.bot.board_refresher.edits_saved} saved"
+        )
+        print(
+            f"rsvp refresher: {self.bot.rsvp_refresher.edits} edits, "
+            f"{self.bot.rsvp_refresher.edits_saved} saved"
+        )
+        print(f"scheduler: {self.bot.scheduler.pending()} jobs pending")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PitBoss Offline-Benchmark")
+    parser.add_argument("--drivers", type=int, default=60)
+    parser.add_argument("--tracks", type=int, default=5)
+    parser.add_argument("--users", type=int, default=20, help="gleichzeitige User")
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--channels", type=int, default=1, help="Channels für User-Commands")
+    parser.add_argument("--latency", type=float, default=0.05, help="API-Latenz in Sekunden")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--uncached", type=float, default=0.2, help="Anteil Fahrer ohne Member-Cache")
+    parser.add_argument("--no-rate-limits", action="store_true")
+    parser.add_argument("--cards", action="store_true", help="Leaderboard-Karten rendern (ohne Trackbilder)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = load_bot(workdir, args.cards)
+        api = FakeAPI(args.latency, args.jitter, not args.no_rate_limits, args.seed)
+        api.install(bot.bot)
+        bot.dispatcher.rate_limits = not args.no_rate_limits
+
+        bench = Bench(bot, api, args)
+
+        async def run():
+            elapsed = await bench.run()
+            bench.report(elapsed)
+            bot.guilds.close()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,74 @@
 import discord
 from discord.ext import commands
 from discord.ui import Button, View
+from discord import app_commands
 from datetime import datetime, timedelta, timezone
-import json
+import functools
+import io
+import re
 import os
 import asyncio
+import atexit
+import signal
+import contextvars
 import socket
 import uuid
+import time
+from storage import JournalStore, BackgroundWriter
+from guilds import GuildRegistry
+from names import NameCache
+from refresh import BoardRefresher
+from pages import PageCache
+from tracks import TrackCatalog
+from metrics import Metrics, RateLimitCounter
+from events import event_context
+from scheduler import Scheduler
+from lease import Lease
+from dispatcher import Dispatcher, INTERACTION, REPLY, BOARD, DELETE
+import importer
+import cards
+import logging
+import typing
 BOOT_ID = uuid.uuid4().hex[:6] # Einzigartige ID für diese Bot-Instanz
+STARTED_AT = time.monotonic()
 
-settings = {
-    "lb_channel_id": None
-}
-
-TRACK_ALIASES = {
-    "paul ricard": "paul ricard",
-    "spa": "spa francorchamps",
-    "spa francorchamps": "spa francorchamps",
-    "monza": "monza",
-    "nürburgring": "nürburgring",
-    "silverstone": "silverstone",
-    "barcelona": "barcelona",
-    "brands hatch": "brands hatch",
-    "hungaroring": "hungaroring",
-    "misano": "misano",
-    "zandvoort": "zandvoort",
-    "zolder": "zolder",
-    "snetterton": "snetterton",
-    "olton park": "olton park",
-    "donington park": "donington park",
-    "kyalami": "kyalami",
-    "suzuka": "suzuka",
-    "laguna seca": "laguna seca",
-    "mount panorama": "mount panorama",
-    "imola": "imola",
-    "watkins glen": "watkins glen",
-    "cota": "circuit of the americas",
-    "circuit of the americas": "circuit of the americas",
-    "indianapolis": "indianapolis",
-    "valencia": "valencia",
-    "red bull ring": "red bull ring",
-    "24h nürburgring": "24h nürburgring"
-}
+# Metriken mit Instanz-Fingerprint (mehrere Instanzen unterscheidbar)
+metrics = Metrics(boot=BOOT_ID, host=socket.gethostname(), pid=os.getpid())
+logging.getLogger("discord.http").addHandler(RateLimitCounter(metrics))
+
+# alle ausgehenden Requests mit Priorität (siehe dispatcher.py)
+dispatcher = Dispatcher(metrics=metrics)
+
+
+async def reply(ctx, *args, **kwargs):
+    # Antwort auf einen !-Command
+    return await dispatcher.call(REPLY, "send", ctx.channel.id, ctx.send, *args, **kwargs)
+
+
+async def respond(func, *args, **kwargs):
+    # Interaction-Antwort (send_message/edit_message/defer), höchste Priorität
+    return await dispatcher.call(INTERACTION, "interaction", None, func, *args, **kwargs)
+startup_done = False
 
 # ===== SINGLE INSTANCE LOCK =====
+# Leader-Lease über data/leader.lease (siehe lease.py): nur der Leader
+# bearbeitet Commands/Buttons und schreibt, Standbys bleiben verbunden.
+lease = Lease(
+    os.path.join("data", "leader.lease"),
+    owner=f"{BOOT_ID}@{socket.gethostname()}:{os.getpid()}",
+    ttl=float(os.getenv("LEASE_TTL", "10"))
+)
+is_leader = False
+leader_epoch = None  # Lease-Epoche, in der wir Leader geworden sind
+leader_task = None
+
+
+def leading():
+    # Lease zusätzlich lokal prüfen: hing der Loop länger als ttl, ist sie weg.
+    # Andere Epoche = zwischendurch war jemand anderes Leader (Cache veraltet).
+    return is_leader and lease.held and lease.epoch == leader_epoch
+
+
 print("BOT INSTANCE STARTED")
 
 # ===== BOT SETUP =====
@@ -51,73 +76,153 @@ intents = discord.Intents.default()
 intents.members = True  # wichtig für Rollencheck
 intents.message_content = True
 
-bot = commands.Bot(
+class PitBossTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction):
+        # Standby antwortet nicht (auch kein Autocomplete) -> kein Doppelpost
+        if interaction.command is not None:
+            event_context.set({"cmd": "/" + interaction.command.name, "by": str(interaction.user.id)})
+            interaction.extras["started_at"] = time.perf_counter()
+        return leading()
+
+
+class PitBoss(commands.AutoShardedBot):
+    _shutdown_task = None
+
+    async def close(self):
+        # offene Boards rendern + alles auf die Platte, dann erst trennen.
+        # SIGTERM und run() rufen close() evtl. beide -> nur einmal herunterfahren
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(shutdown())
+        await self._shutdown_task
+        await super().close()
+
+
+bot = PitBoss(
     command_prefix="!",
     intents=intents,
-    help_command=None
+    help_command=None,
+    tree_cls=PitBossTree
 )
+
+
+class NotLeader(commands.CheckFailure):
+    pass
+
+
+@bot.check
+async def leader_only(ctx):
+    if not leading():
+        raise NotLeader()
+    return True
+
+driver_names = NameCache(bot, dispatcher, metrics=metrics)
+rsvp_view = None  # wird in setup_hook angelegt (braucht laufenden Event-Loop)
 # ================= TRACK DATABASE =====================
-track_images = {
-        "paul ricard": "https://img2.51gt3.com/rac/track/202304/b16da65815684d12aea6b42f42365882.png",
-        "spa francorchamps": "https://img2.51gt3.com/rac/track/202304/1aebcbf68ab14bce81924c06009fbe62.png",
-        "monza": "https://img2.51gt3.com/rac/track/202304/73988af861d14f0bb3b39149aefaff65.png",
-        "nürburgring": "https://img2.51gt3.com/rac/track/202304/2478955935b2421b9bc575c3f641123d.png",
-        "silverstone": "https://img2.51gt3.com/rac/track/202304/fed0c74be75347a490b23f65a87c1d0e.png",
-        "barcelona": "https://img2.51gt3.com/rac/track/202303/35ad041fd64f44628adaec94b0769607.png",
-        "brands Hatch": "https://img2.51gt3.com/rac/track/202309/f24f80e559c54c12ba9a7bd87e28810b.png",
-        "hungaroring": "https://img2.51gt3.com/rac/track/202309/f24f80e559c54c12ba9a7bd87e28810b.png",
-        "misano": "https://img2.51gt3.com/rac/track/202309/fe1b0789c5444c63907024a8da445a1e.png",
-        "zandvoort": "https://img2.51gt3.com/rac/track/202304/f7d718f5f16f49038f69f21a3f3d972f.png",
-        "zolder": "https://img2.51gt3.com/rac/track/202305/ad7f0a9354834df8a4898d1eb7f549d0.png",
-        "snetterton": "https://www.apexracingleague.com/wp-content/uploads/2020/02/Snetterton.png",
-        "olton Park": "https://img2.51gt3.com/rac/track/202503/e4ca6e6c4e074879a61ea4492bac3585.jpg",
-        "donington Park": "https://img2.51gt3.com/rac/track/202305/04ed487923dc4373bdab93c252584a7b.png",
-        "kyalami": "https://img2.51gt3.com/rac/track/202305/1a6fd3813dbb421bbb0aee79cac6d4d8.png",
-        "suzuka": "https://img2.51gt3.com/rac/track/aacbce6c41dd4e5496eea246fc5e7c6b.jpg",
-        "laguna seca": "https://img2.51gt3.com/rac/track/202305/cbf13c969f28425299c2c450576fe052.png",
-        "mount panorama": "https://img2.51gt3.com/rac/track/202403/a068e9fe89f1471594711b1d624190a8.jpg",
-        "imola": "https://img2.51gt3.com/rac/track/202304/15ab044da2b542b587a5ddba4a9ce76e.png",
-        "watkins glen": "https://img2.51gt3.com/rac/track/202305/fbc2519ce917489ea6c385147e8b196a.png",
-        "circuit of the americas": "https://img2.51gt3.com/rac/track/202303/d093da62dab34f54b494979cce5a7a1c.png",
-        "indianapolis": "https://img2.51gt3.com/rac/track/202502/da6a99e10588446ab8c87145f99741ac.jpg",
-        "valencia": "https://img2.51gt3.com/rac/track/202304/e96ba2e3abbc4183b11627ecde2bf351.png",
-        "red bull ring": "https://img2.51gt3.com/rac/track/202304/10482227212b4ac3a557ce0197cb87a0.png",
-        "24h nürburgring": "https://img2.51gt3.com/rac/track/202509/5aec8bbe6ad540adbe11493582550458.jpg",
-    }
+# Tracks, Bilder + Aliase kommen aus tracks.json (siehe tracks.py),
+# !reload_tracks tauscht den Katalog zur Laufzeit aus.
+TRACKS_FILE = os.getenv("TRACKS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tracks.json"))
+
+# ein Katalog + kompilierter Index für alle Commands
+tracks = TrackCatalog.from_file(TRACKS_FILE)
 # ================= HOTLAP LEADERBOARD =================
 
-leaderboards = {}  # { "monza": { user_id: time_in_seconds } }
-leaderboard_messages = {}
+# Daten pro Guild, lazy geladen (siehe guilds.py).
+# Geschrieben wird nur im Hintergrund-Thread, nie auf dem Event-Loop.
+writer = BackgroundWriter(flush_interval=float(os.getenv("FLUSH_INTERVAL", "1")))
+atexit.register(writer.close)  # falls run() ohne shutdown() endet
+guilds = GuildRegistry("data", metrics=metrics, writer=writer, fence=leading)
+
+# Zeitgesteuerte Jobs (Löschen, Erinnerungen, RSVP schließen), eigenes Journal
+scheduler = Scheduler(
+    JournalStore(os.path.join("data", "scheduler.json"), os.path.join("data", "scheduler.journal"), writer=writer),
+    metrics=metrics,
+    fence=leading
+)
+RACE_REMINDER_MINUTES = int(os.getenv("RACE_REMINDER_MINUTES", "30"))
 
-def normalize_track(track: str):
-    return track.strip().lower()
 
-def save_data():
-    data = {
-        "laps": leaderboards,
-        "messages": leaderboard_messages,
-        "settings": settings
-    }
-    with open("data.json", "w") as f:
-        json.dump(data, f)
+def guild_data(guild_id):
+    # Laden (Baseline) und Relink gehören nicht zum Command, der die Guild
+    # zufällig als erster braucht -> leerer Kontext, kein cmd/by im Event-Log
+    if guild_id not in guilds:
+        contextvars.Context().run(guilds.get, guild_id)
+    data = guilds.get(guild_id)
+
+    # Board-Links einmal pro Prozess prüfen, sobald die Guild aktiv wird
+    if not data.linked:
+        data.linked = True
+        asyncio.get_running_loop().create_task(relink_boards(data), context=contextvars.Context())
+
+    return data
+
+# ===== GEPLANTE JOBS =====
+
+def delete_later(message, delay):
+    # ein Job im Scheduler statt sleep im Handler (überlebt Neustarts)
+    scheduler.later("delete", delay, channel_id=message.channel.id, message_id=message.id)
+
+
+@scheduler.handler("delete")
+async def delete_message_job(job):
+    # fire-and-forget: schon weg / keine Rechte zählt der Dispatcher nur mit
+    message = bot.get_partial_messageable(job["channel_id"]).get_partial_message(job["message_id"])
+    dispatcher.fire(DELETE, "delete", job["channel_id"], message.delete)
+
 
+@scheduler.handler("race_reminder")
+async def race_reminder_job(job):
+    data = guild_data(job["guild_id"])
+    event = data.race_events.get(job["message_id"])
 
-def load_data():
-    global leaderboards, leaderboard_messages, settings
+    # Event gelöscht, schon geschlossen oder nach Neustart verpasst
+    if event is None or event.get("closed") or event["timestamp"] <= time.time():
+        return
+
+    accepted = [uid for uid, status in event["rsvp"].items() if status == "accepted"]
+    if not accepted:
+        return
+
+    # eine Nachricht mit allen Zusagen statt einer DM pro Fahrer
+    mentions = " ".join(f"<@{uid}>" for uid in accepted)
+    channel = bot.get_partial_messageable(event["channel_id"])
+    reminder = await dispatcher.call(
+        REPLY, "send", event["channel_id"], channel.send,
+        f"⏰ {event['track'].title()} startet <t:{event['timestamp']}:R> — {mentions}"[:2000]
+    )
+    scheduler.schedule("delete", event["timestamp"] + 2 * 3600, channel_id=event["channel_id"], message_id=reminder.id)
+
+
+@scheduler.handler("close_rsvp")
+async def close_rsvp_job(job):
+    data = guild_data(job["guild_id"])
+    event = data.race_events.get(job["message_id"])
+    if event is None or event.get("closed"):
+        return
 
+    event["closed"] = True
+    data.journal("event_closed", message_id=job["message_id"])
+    race_embed_bases.pop(job["message_id"], None)
+
+    # Buttons entfernen, Embed zeigt "Anmeldung geschlossen"
     try:
-        with open("data.json", "r") as f:
-            data = json.load(f)
+        message = bot.get_partial_messageable(event["channel_id"]).get_partial_message(int(job["message_id"]))
+        await dispatcher.call(
+            BOARD, "edit", event["channel_id"], message.edit,
+            embed=build_race_embed(event, job["message_id"]), view=None
+        )
+    except discord.HTTPException:
+        pass
 
-        leaderboards = data.get("laps", {})
-        leaderboard_messages = data.get("messages", {})
-        settings = data.get("settings", settings)
 
-    except:
-        leaderboards = {}
-        leaderboard_messages = {}
-        # settings NICHT überschreiben, sonst verlierst du defaults
+def track_not_found_text(raw):
+    suggestions = tracks.suggest(raw)
+    if suggestions:
+        names = ", ".join(t.title() for t in suggestions)
+        return f"❌ Track nicht erkannt. Meintest du: {names}?"
+    return "❌ Track nicht erkannt."
 
+async def track_not_found(ctx, raw):
+    await reply(ctx, track_not_found_text(raw))
 
 def time_to_seconds(time_str):
     try:
@@ -202,87 +307,167 @@ def is_owner_or_role():
 
     return commands.check(predicate)
 
+def app_is_owner_or_role():
+    # gleicher Check für Slash-Commands (Interaction statt Context)
+    async def predicate(interaction):
+        if interaction.user.id == BOT_OWNER_ID:
+            return True
+
+        if interaction.guild is None:
+            return False
+
+        member = interaction.guild.get_member(interaction.user.id)
+        if member is None:
+            return False
+
+        user_roles = [role.name for role in member.roles]
+        return any(role in ALLOWED_ROLES for role in user_roles)
+
+    return app_commands.check(predicate)
+
 
 # ================= VIEW =================
 
-class RSVPView(View):
-    def __init__(self, info_text=None, image_url=None):
-        super().__init__(timeout=None)
-        self.accepted = set()
-        self.declined = set()
-        self.tentative = set()
-
-        self.timestamp = None
-        self.google_link = None
-        self.info_text = info_text
-        self.image_url = image_url
-
-    async def update_message(self, interaction):
-        embed = discord.Embed(
-            title=f"🏁 {self.track.title()} - It's Race Time !",
-            description=(
-                "Please vote if you are racing:\n\n"
-                f"📅 Race Time: <t:{self.timestamp}:F>\n"
-                f"⏳ Countdown: <t:{self.timestamp}:R>\n"
-                f"📆 [Add to Google Calendar]({self.google_link})\n\n"
-                f"ℹ️ Info: {self.info_text if self.info_text else '-'}\n\u200b\n"
-            ),
-            color=0xF1C40F
-        )
+RSVP_FIELDS = [
+    ("accepted", "🟢 Accepted"),
+    ("declined", "🔴 Declined"),
+    ("tentative", "🟡 Maybe"),
+]
 
-        # Footer beim Update beibehalten
-        instance = f"{socket.gethostname()} | pid:{os.getpid()} | boot:{BOOT_ID}"
-        embed.set_footer(text=f"PitBoss Systems • {instance}")
 
-        if self.image_url:
-            embed.set_image(url=self.image_url)
+# Footer-Fingerprint ändert sich zur Laufzeit nicht -> einmal bauen
+RACE_FOOTER = f"PitBoss Systems • {socket.gethostname()} | pid:{os.getpid()} | boot:{BOOT_ID}"
 
-        embed.add_field(name="\u200b", value="\u200b", inline=False)
+# Statischer Teil (Titel, Text, Footer, Bild) pro Race-Post, als Embed-Dict
+race_embed_bases = {}  # { message_id: dict }
 
+
+def race_embed_base(event):
+    embed = discord.Embed(
+        title=f"🏁 {event['track'].title()} - It's Race Time !",
+        description=(
+            "Please vote if you are racing:\n\n"
+            f"📅 Race Time: <t:{event['timestamp']}:F>\n"
+            f"⏳ Countdown: <t:{event['timestamp']}:R>\n"
+            f"📆 [Add to Google Calendar]({event['google_link']})\n\n"
+            f"ℹ️ Info: {event['info'] if event['info'] else '-'}\n\u200b\n"
+            + ("🔒 Anmeldung geschlossen\n" if event.get("closed") else "")
+        ),
+        color=0xF1C40F
+    )
+
+    # Footer (dein Fingerprint kann bleiben)
+    embed.set_footer(text=RACE_FOOTER)
+
+    if event["image_url"]:
+        embed.set_image(url=event["image_url"])
+
+    return embed.to_dict()
+
+
+def build_race_embed(event, message_id=None):
+    base = race_embed_bases.get(message_id)
+    if base is None:
+        base = race_embed_base(event)
+        if message_id is not None:
+            race_embed_bases[message_id] = base
+
+    # from_dict teilt Footer/Bild mit dem Cache, Felder kommen neu dazu
+    embed = discord.Embed.from_dict(base)
+    embed.add_field(name="\u200b", value="\u200b", inline=False)
+
+    # Member-IDs als Mentions -> Discord zeigt die Namen an
+    for status, label in RSVP_FIELDS:
+        members = [f"<@{uid}>" for uid, s in event["rsvp"].items() if s == status]
         embed.add_field(
-            name=f"🟢 Accepted ({len(self.accepted)})",
-            value="\n".join(self.accepted) or "-",
-            inline=False
-        )
-        embed.add_field(
-            name=f"🔴 Declined ({len(self.declined)})",
-            value="\n".join(self.declined) or "-",
-            inline=False
-        )
-        embed.add_field(
-            name=f"🟡 Maybe ({len(self.tentative)})",
-            value="\n".join(self.tentative) or "-",
+            name=f"{label} ({len(members)})",
+            value="\n".join(members) or "-",
             inline=False
         )
 
-        await interaction.response.edit_message(embed=embed, view=self)
+    return embed
+
+
+async def refresh_race_post(key):
+    guild_id, message_id = key
+    event = guild_data(guild_id).race_events.get(message_id)
+    if event is None:
+        return
+
+    message = bot.get_partial_messageable(event["channel_id"]).get_partial_message(int(message_id))
+    with metrics.timer("discord_api_seconds", call="rsvp_edit"):
+        await dispatcher.call(BOARD, "edit", event["channel_id"], message.edit, embed=build_race_embed(event, message_id))
+
+
+# Viele Klicks kurz hintereinander -> ein Edit pro Race-Post
+rsvp_refresher = BoardRefresher(
+    refresh_race_post,
+    window=float(os.getenv("RSVP_EDIT_WINDOW", "1"))
+)
+
+
+class RSVPView(View):
+    # Eine Instanz für ALLE Race-Posts (bot.add_view in setup_hook).
+    # Der Zustand hängt an der Message-ID in race_events der Guild, nicht an der View,
+    # deshalb funktionieren die Buttons auch nach einem Neustart.
+
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    async def interaction_check(self, interaction):
+        event_context.set({"cmd": "rsvp", "by": str(interaction.user.id)})
+        return leading()
+
+    async def set_status(self, interaction, status):
+        # Laufzeit für den Trace im Event-Log (replay.py --trace)
+        started_at = time.perf_counter()
+        try:
+            await self.apply_status(interaction, status)
+        finally:
+            guild_data(interaction.guild_id).log(
+                "button", status=status, message_id=str(interaction.message.id),
+                channel=interaction.channel.id, ms=round((time.perf_counter() - started_at) * 1000, 3)
+            )
+
+    async def apply_status(self, interaction, status):
+        message_id = str(interaction.message.id)
+        data = guild_data(interaction.guild_id)
+        event = data.race_events.get(message_id)
+
+        if event is None:
+            await respond(interaction.response.send_message, "❌ Dieses Event ist nicht mehr aktiv.", ephemeral=True)
+            return
+
+        if event.get("closed"):
+            await respond(interaction.response.send_message, "🔒 Die Anmeldung ist geschlossen.", ephemeral=True)
+            return
+
+        # sofort bestätigen (innerhalb der 3s), das Embed wird gesammelt editiert
+        with metrics.timer("rsvp_seconds"):
+            await respond(interaction.response.defer)
+
+        user_id = str(interaction.user.id)
+        if event["rsvp"].get(user_id) != status:
+            event["rsvp"][user_id] = status
+            data.journal("rsvp", message_id=message_id, user=user_id, status=status)
+            rsvp_refresher.mark_dirty((interaction.guild_id, message_id))
+
+        metrics.inc("rsvp_clicks_total", status=status)
 
 
     # ===== BUTTONS =====
 
-    @discord.ui.button(label="Accepted", style=discord.ButtonStyle.success, emoji="✅")
+    @discord.ui.button(label="Accepted", style=discord.ButtonStyle.success, emoji="✅", custom_id="pitboss:rsvp:accepted")
     async def accept(self, interaction: discord.Interaction, button: Button):
-        user = interaction.user.display_name
-        self.declined.discard(user)
-        self.tentative.discard(user)
-        self.accepted.add(user)
-        await self.update_message(interaction)
+        await self.set_status(interaction, "accepted")
 
-    @discord.ui.button(label="Declined", style=discord.ButtonStyle.danger, emoji="❌")
+    @discord.ui.button(label="Declined", style=discord.ButtonStyle.danger, emoji="❌", custom_id="pitboss:rsvp:declined")
     async def decline(self, interaction: discord.Interaction, button: Button):
-        user = interaction.user.display_name
-        self.accepted.discard(user)
-        self.tentative.discard(user)
-        self.declined.add(user)
-        await self.update_message(interaction)
+        await self.set_status(interaction, "declined")
 
-    @discord.ui.button(label="Tentative", style=discord.ButtonStyle.secondary, emoji="❓")
+    @discord.ui.button(label="Tentative", style=discord.ButtonStyle.secondary, emoji="❓", custom_id="pitboss:rsvp:tentative")
     async def maybe(self, interaction: discord.Interaction, button: Button):
-        user = interaction.user.display_name
-        self.accepted.discard(user)
-        self.declined.discard(user)
-        self.tentative.add(user)
-        await self.update_message(interaction)
+        await self.set_status(interaction, "tentative")
 
 # ================= COMMAND =================
 
@@ -291,9 +476,9 @@ from urllib.parse import quote_plus
 
 # ===== RACE =====
 
-@bot.command()
-@is_owner_or_role()
-async def race(ctx, date: str, time: str, *, track: str):
+async def post_race(channel, guild_id, date, time, track):
+    """Race-Post senden + Event anlegen (für !race und /race).
+    Wirft ValueError bei ungültigem Datum."""
 
     # Beschreibung parsen
     if "|" in track:
@@ -322,295 +507,944 @@ async def race(ctx, date: str, time: str, *, track: str):
     )
 
     # Trackbild finden
-    track_lower = track.lower()
-    image_url = None
-    for key, url in track_images.items():
-        if key.lower() in track_lower:
-            image_url = url
-            break
+    image_url = tracks.image(tracks.find_in(track))
+
+    event = {
+        "track": track,
+        "timestamp": timestamp,
+        "google_link": google_link,
+        "info": desc,
+        "image_url": image_url,
+        "channel_id": channel.id,
+        "rsvp": {}  # { user_id: "accepted" | "declined" | "tentative" }
+    }
+
+    # NUR EINMAL senden
+    msg = await dispatcher.call(REPLY, "send", channel.id, channel.send, embed=build_race_embed(event), view=rsvp_view)
+
+    data = guild_data(guild_id)
+    data.race_events[str(msg.id)] = event
+    data.journal("event", message_id=str(msg.id), event={k: v for k, v in event.items() if k != "rsvp"})
+
+    # Erinnerung an alle Zusagen + Anmeldung zum Start schließen
+    job = {"guild_id": guild_id, "message_id": str(msg.id)}
+    scheduler.schedule("race_reminder", timestamp - RACE_REMINDER_MINUTES * 60, **job)
+    scheduler.schedule("close_rsvp", timestamp, **job)
+
+    return msg
+
+
+@bot.command()
+@commands.guild_only()
+@is_owner_or_role()
+async def race(ctx, date: str, time: str, *, track: str):
+    await post_race(ctx.channel, ctx.guild.id, date, time, track)
+
+    # Command löschen
+    delete_later(ctx.message, 1)
+
+# ===== LEADERBOARD SEITEN =====
+
+page_cache = PageCache(page_size=20)
+
+
+async def render_page(guild, track, page):
+    board = guild_data(guild.id).board(track)
+    key = (guild.id, track)
+    pages = page_cache.page_count(len(board))
+    page = max(0, min(page, pages - 1))
+
+    text = page_cache.get(key, page, board.version)
+    if text is None:
+        version = board.version
+        start = page * page_cache.page_size
+        entries = list(board.range(start, start + page_cache.page_size))
+        names = await driver_names.resolve(guild, [uid for uid, _ in entries])
+
+        text = ""
+        for pos, (uid, secs) in enumerate(entries, start + 1):
+            name = names.get(uid) or f"<@{uid}>"
+            text += f"**#{pos} {name} — {seconds_to_time(secs)}**\n"
+
+        if text == "":
+            text = "Noch keine Zeiten"
+
+        # nur cachen, wenn sich das Board währenddessen nicht geändert hat
+        if board.version == version:
+            page_cache.put(key, page, version, text)
 
-    # Embed bauen
     embed = discord.Embed(
-        title=f"🏁 {track.title()} - It's Race Time !",
-        description=(
-            "Please vote if you are racing:\n\n"
-            f"📅 Race Time: <t:{timestamp}:F>\n"
-            f"⏳ Countdown: <t:{timestamp}:R>\n"
-            f"📆 [Add to Google Calendar]({google_link})\n\n"
-            f"ℹ️ Info: {desc if desc else '-'}\n\u200b\n"
-        ),
-        color=0xF1C40F
+        title=f"🏁 {track.title()} Leaderboard",
+        description=text,
+        color=discord.Color.red()
     )
+    embed.set_footer(text=f"Seite {page + 1}/{pages} • {len(board)} Fahrer")
+    return embed, page
 
-    # Footer (dein Fingerprint kann bleiben)
-    instance = f"{socket.gethostname()} | pid:{os.getpid()} | boot:{BOOT_ID}"
-    embed.set_footer(text=f"PitBoss Systems • {instance}")
+# ===== LEADERBOARD KARTEN =====
 
-    if image_url:
-        embed.set_image(url=image_url)
+# PNG-Karten statt Text, wenn Pillow installiert ist (LEADERBOARD_CARDS=0 schaltet ab)
+CARDS_ENABLED = cards.available() and os.getenv("LEADERBOARD_CARDS", "1") != "0"
+card_cache = cards.CardCache(
+    os.path.join("data", "cards"),
+    max_bytes=int(os.getenv("CARD_CACHE_MB", "50")) * 1024 * 1024,
+    metrics=metrics
+)
 
-    embed.add_field(name="\u200b", value="\u200b", inline=False)
-    embed.add_field(name="🟢 Accepted (0)", value="-", inline=False)
-    embed.add_field(name="🔴 Declined (0)", value="-", inline=False)
-    embed.add_field(name="🟡 Maybe (0)", value="-", inline=False)
 
-    # View
-    view = RSVPView(info_text=desc, image_url=image_url)
-    view.timestamp = timestamp
-    view.google_link = google_link
-    view.track = track
+async def page_card(guild, track, page, embed):
+    """Karte zu einem fertigen Seiten-Embed anhängen. Gibt die Dateien für
+    send(files=...) / edit(attachments=...) zurück (leer = Text-Board)."""
+    if not CARDS_ENABLED or embed.description == "Noch keine Zeiten":
+        return []
 
-    # NUR EINMAL senden
-    msg = await ctx.send(embed=embed, view=view)
-    view.message = msg
+    image_url = tracks.image(track)
+
+    async def rows():
+        board = guild_data(guild.id).board(track)
+        start = page * page_cache.page_size
+        entries = list(board.range(start, start + page_cache.page_size))
+        names = await driver_names.resolve(guild, [uid for uid, _ in entries])
+        return [
+            (pos, names.get(uid) or uid, seconds_to_time(secs))
+            for pos, (uid, secs) in enumerate(entries, start + 1)
+        ]
 
-    # Command löschen
-    await asyncio.sleep(1)
     try:
-        await ctx.message.delete()
-    except:
-        pass
+        with metrics.timer("card_seconds"):
+            # Seitentext kommt aus dem PageCache -> unverändertes Board = gleicher Key.
+            # Ohne Trackbild gerendert = eigener Key, sonst bliebe die Karte so.
+            art_path = await card_cache.artwork(image_url)
+            key = cards.card_key(track, page, embed.description, embed.footer.text, image_url, art_path is not None)
+            png = await card_cache.get(key)
+            if png is None:
+                render = functools.partial(
+                    cards.render_card, f"{track.title()} Leaderboard", await rows(), embed.footer.text
+                )
+                png = await card_cache.card(key, render, art_path)
+    except Exception as e:
+        print(f"⚠️ Leaderboard-Karte fehlgeschlagen ({track}): {e}")
+        return []
+
+    embed.description = None
+    embed.set_image(url="attachment://leaderboard.png")
+    return [discord.File(io.BytesIO(png), filename="leaderboard.png")]
+
+
+class LeaderboardView(View):
+    def __init__(self, guild, track, page=0):
+        super().__init__(timeout=300)
+        self.guild = guild
+        self.track = track
+        self.page = page
+
+    async def interaction_check(self, interaction):
+        return leading()
+
+    async def show(self, interaction, page):
+        # Namen auflösen / Karte rendern kann dauern -> erst bestätigen (3s)
+        await respond(interaction.response.defer)
+        embed, self.page = await render_page(self.guild, self.track, page)
+        files = await page_card(self.guild, self.track, self.page, embed)
+        await respond(interaction.edit_original_response, embed=embed, attachments=files, view=self)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, button: Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: Button):
+        await self.show(interaction, self.page + 1)
+
+    @discord.ui.button(label="Meine Position", emoji="📍", style=discord.ButtonStyle.primary)
+    async def my_position(self, interaction: discord.Interaction, button: Button):
+        rank = guild_data(self.guild.id).board(self.track).rank(str(interaction.user.id))
+        if rank is None:
+            await respond(interaction.response.send_message, "❌ Du hast auf diesem Track noch keine Zeit.", ephemeral=True)
+            return
+        await self.show(interaction, page_cache.page_of(rank))
+
+# ===== LEADERBOARD REFRESH =====
+
+BOARD_ROWS_GROUPED = 8  # alle Embeds einer Message zusammen max. 6000 Zeichen
+
+message_locks = {}  # { message_id: asyncio.Lock } - ein Edit pro Message gleichzeitig
+
+
+async def board_embed(guild, track, grouped=False):
+    # Seite 1 aus dem Cache; in Sammel-Messages gekürzt
+    embed, _ = await render_page(guild, track, 0)
+    board = guild_data(guild.id).board(track)
+    rows = BOARD_ROWS_GROUPED if grouped else page_cache.page_size
+
+    if grouped:
+        embed.description = "\n".join(embed.description.split("\n")[:rows])
+    if len(board) > rows:
+        embed.set_footer(text=f"Top {rows} von {len(board)} • !leaderboard {track} für alle")
+    elif grouped:
+        embed.remove_footer()
+
+    return embed
+
+
+async def refresh_board(key):
+    guild_id, track = key
+    data = guild_data(guild_id)
+
+    # --- Leaderboard Message prüfen ---
+    link = data.leaderboard_messages.get(track)
+    if link is None:
+        return
+
+    channel = bot.get_channel(link["channel_id"])
+    if not channel:
+        return
+
+    # alle Boards, die in derselben Message stecken (Reihenfolge = slot)
+    group = sorted(
+        (other.get("slot", 0), t)
+        for t, other in data.leaderboard_messages.items()
+        if other["message_id"] == link["message_id"]
+    )
+
+    lock = message_locks.setdefault(link["message_id"], asyncio.Lock())
+    async with lock:
+        # --- Leaderboard neu bauen (aus dem Seiten-Cache, kein fetch nötig) ---
+        embeds = [await board_embed(channel.guild, t, grouped=len(group) > 1) for _, t in group]
+
+        # Karte nur für Boards mit eigener Message (Sammel-Messages bleiben Text)
+        extra = {}
+        if len(group) == 1:
+            extra["attachments"] = await page_card(channel.guild, track, 0, embeds[0])
+
+        with metrics.timer("discord_api_seconds", call="edit"):
+            message = channel.get_partial_message(link["message_id"])
+            await dispatcher.call(BOARD, "edit", channel.id, message.edit, embeds=embeds, **extra)
+
+
+board_refresher = BoardRefresher(
+    refresh_board,
+    window=float(os.getenv("LB_REFRESH_WINDOW", "3"))
+)
 
 # ===== HOTLAP =====
 
+def record_lap(guild_id, user_id, track, seconds):
+    """Runde eintragen (für !hotlap und /hotlap). Gibt (neue Bestzeit?, Antwort) zurück."""
+    data = guild_data(guild_id)
+
+    # --- Jede Runde in die Historie (auch langsamere) ---
+    ms = round(seconds * 1000)
+    ts = int(datetime.now(timezone.utc).timestamp())
+    data.history(track).add(user_id, ms, ts)
+    data.journal("laptime", track=track, user=user_id, ms=ms, ts=ts)
+
+    # --- Leaderboard (wird bei Bedarf angelegt) ---
+    board = data.board(track)
+
+    # --- Beste Zeit speichern ---
+    if not board.submit(user_id, seconds):
+        return False, "❌ Deine vorherige Runde ist schneller. (Runde ist in !progress gespeichert)"
+
+    data.journal("lap", track=track, user=user_id, time=seconds)
+    data.board_changed(track)
+    page_cache.invalidate((guild_id, track), board.version, *board.last_change)
+
+    # Board wird gesammelt aktualisiert (mehrere Hotlaps -> ein Edit)
+    if track in data.leaderboard_messages:
+        board_refresher.mark_dirty((guild_id, track))
+
+    # --- Position + Abstand zu P1 direkt aus dem Index ---
+    position = board.rank(user_id)
+    if position == 1:
+        result = "P1 🏆"
+    else:
+        result = f"P{position} (+{board.gap_to_leader(user_id):.3f} auf P1)"
+
+    return True, f"✅ {seconds_to_time(seconds)} auf {track.title()} — {result}"
+
+
 @bot.command()
+@commands.guild_only()
 async def hotlap(ctx, *, args):
     args = args.strip()
 
     # --- Format prüfen ---
     if "|" not in args:
-        await ctx.send("❌ Format: !hotlap track | 1:47.221")
+        guild_data(ctx.guild.id).log("lap_rejected", input=args, reason="format")
+        await reply(ctx, "❌ Format: !hotlap track | 1:47.221")
         return
 
     track_raw, lap_time = args.split("|", 1)
     track_raw = track_raw.strip()
     lap_time = lap_time.strip()
 
-    # --- Track normalisieren ---
-    track = normalize_track(track_raw)
-
-    # Alias umwandeln falls nötig
-    if track in TRACK_ALIASES:
-        track = TRACK_ALIASES[track]
-
-    # Existiert der Track?
-    if track not in track_images:
-        await ctx.send("❌ Track nicht erkannt.")
+    # --- Track auflösen (Alias, Schreibweise, Prefix) ---
+    track = tracks.resolve(track_raw)
+    if track is None:
+        guild_data(ctx.guild.id).log("lap_rejected", input=args, reason="track")
+        await track_not_found(ctx, track_raw)
         return
 
     # --- Zeit validieren ---
     seconds = time_to_seconds(lap_time)
     if seconds is None:
-        await ctx.send("❌ Invalid time format. Use: 1:47.221")
+        guild_data(ctx.guild.id).log("lap_rejected", input=args, reason="time")
+        await reply(ctx, "❌ Invalid time format. Use: 1:47.221")
         return
 
-    user_id = str(ctx.author.id)
-
-    # --- Leaderboard initialisieren falls nötig ---
-    if track not in leaderboards:
-        leaderboards[track] = {}
-
-    # --- Beste Zeit speichern ---
-    if user_id in leaderboards[track]:
-        if seconds >= leaderboards[track][user_id]:
-            await ctx.send("❌ Deine vorherige Runde ist schneller.")
-            return
+    improved, text = record_lap(ctx.guild.id, str(ctx.author.id), track, seconds)
+    if not improved:
+        await reply(ctx, text)
+        return
 
-    leaderboards[track][user_id] = seconds
-    save_data()
+    msg = await reply(ctx, text)
+    delete_later(msg, 10)
 
     # --- Leaderboard Message prüfen ---
-    if track not in leaderboard_messages:
-        await ctx.send("❌ Leaderboard nicht eingerichtet. Admin: !setup_lb")
+    if track not in guild_data(ctx.guild.id).leaderboard_messages:
+        await reply(ctx, "❌ Leaderboard nicht eingerichtet. Admin: !setup_lb")
         return
 
-    channel_id = leaderboard_messages[track]["channel_id"]
-    message_id = leaderboard_messages[track]["message_id"]
+    # --- Command löschen (sauberer Channel) ---
+    delete_later(ctx.message, 1)
 
-    channel = bot.get_channel(channel_id)
-    if not channel:
-        return
+    
+# ===== LEADERBOARD =====
 
-    try:
-        msg = await channel.fetch_message(message_id)
-    except:
+@bot.command()
+@commands.guild_only()
+async def leaderboard(ctx, *, track: str):
+    track_raw = track
+    track = tracks.resolve(track_raw)
+    if track is None:
+        await track_not_found(ctx, track_raw)
         return
 
-    # --- Leaderboard neu bauen ---
-    sorted_times = sorted(
-        leaderboards[track].items(),
-        key=lambda x: x[1]
-    )
+    board = guild_data(ctx.guild.id).leaderboards.get(track)
+    if not board:
+        await reply(ctx, "❌ No times recorded for this track.")
+        return
 
-    text = ""
-    pos = 1
+    embed, _ = await render_page(ctx.guild, track, 0)
+    files = await page_card(ctx.guild, track, 0, embed)
+    await reply(ctx, embed=embed, files=files, view=LeaderboardView(ctx.guild, track))
 
-    for uid, secs in sorted_times:
-        try:
-            user = await bot.fetch_user(int(uid))
-            mins = int(secs // 60)
-            sec = secs % 60
-            formatted = f"{mins}:{sec:06.3f}"
-            text += f"**#{pos} {user.name} — {formatted}**\n"
-            pos += 1
-        except:
-            continue
 
-    if text == "":
-        text = "Noch keine Zeiten"
+async def create_board(channel, guild_id, track):
+    """Leeres Board posten + verknüpfen (für !setup_lb und /setup_lb)."""
 
+    # Leaderboard Embed erstellen
     embed = discord.Embed(
         title=f"🏁 {track.title()} Leaderboard",
-        description=text,
+        description="Noch keine Zeiten",
         color=discord.Color.red()
     )
 
-    await msg.edit(embed=embed)
+    # Leaderboard posten
+    leaderboard_msg = await dispatcher.call(REPLY, "send", channel.id, channel.send, embed=embed)
 
-    # --- Command löschen (sauberer Channel) ---
-    await asyncio.sleep(1)
-    try:
-        await ctx.message.delete()
-    except:
-        pass
+    # Message speichern (erst nach einem laufenden Relink, sonst prüft der den alten Link)
+    data = guild_data(guild_id)
+    async with data.link_lock:
+        data.leaderboard_messages[track] = {
+            "channel_id": channel.id,
+            "message_id": leaderboard_msg.id
+        }
+
+        # Im Journal speichern
+        data.journal("board", track=track, channel_id=channel.id, message_id=leaderboard_msg.id)
+    return leaderboard_msg
 
-    
-# ===== LEADERBOARD =====
 
 @bot.command()
-async def leaderboard(ctx, *, track: str):
-    track = track.lower().strip()
-    track = " ".join(track.split())  # Mehrfache Leerzeichen entfernen
+@commands.guild_only()
+async def setup_lb(ctx, *, track: str):
 
-    if track not in leaderboards or len(leaderboards.get(track, {})) == 0:
-        await ctx.send("❌ No times recorded for this track.")
+    # Track auflösen
+    track_raw = track
+    track = tracks.resolve(track_raw)
+    if track is None:
+        await track_not_found(ctx, track_raw)
         return
 
-    sorted_times = sorted(leaderboards[track].items(), key=lambda x: x[1])
+    await create_board(ctx.channel, ctx.guild.id, track)
+
+    # kurze Bestätigung senden, dann setup command + Bestätigung löschen
+    confirm = await reply(ctx, f"✅ Leaderboard für {track} erstellt")
+    delete_later(ctx.message, 2)
+    delete_later(confirm, 2)
 
-    description = ""
-    position = 1
+@bot.command()
+@commands.guild_only()
+@is_owner_or_role()
+async def setup_all_lb(ctx):
+    data = guild_data(ctx.guild.id)
 
-    for user_id, time in sorted_times:
-        user = await bot.fetch_user(user_id)
-        formatted_time = seconds_to_time(time)
-        description += f"#{position} {user.name} — {formatted_time}\n"
-        position += 1
+    # wartet auf einen laufenden Relink (erster Command nach dem Start)
+    async with data.link_lock:
+        await setup_missing_boards(ctx, data)
+
+
+async def setup_missing_boards(ctx, data):
+    # tote Links entfernen -> es werden nur fehlende Boards neu angelegt
+    await verify_board_links(data)
+    missing = [t for t in tracks.names() if t not in data.leaderboard_messages]
+
+    if not missing:
+        delete_later(await reply(ctx, "✅ Alle Leaderboards sind vorhanden."), 5)
+        return
+
+    # bis zu 10 Boards pro Message (Discord-Limit für Embeds)
+    links = {}
+    for i in range(0, len(missing), 10):
+        group = missing[i:i + 10]
+        embeds = await asyncio.gather(*(board_embed(ctx.guild, t, grouped=True) for t in group))
+
+        # nacheinander senden, damit die Reihenfolge im Channel stimmt;
+        # 429s fängt discord.py pro Bucket selbst ab
+        msg = await reply(ctx, embeds=list(embeds))
+
+        for slot, track in enumerate(group):
+            links[track] = {
+                "channel_id": ctx.channel.id,
+                "message_id": msg.id,
+                "slot": slot
+            }
+
+    # alle Links in einem Journal-Eintrag
+    data.leaderboard_messages.update(links)
+    data.journal("boards", links=links)
+
+    messages = (len(missing) + 9) // 10
+    delete_later(await reply(ctx, f"✅ {len(links)} Leaderboards in {messages} Nachrichten erstellt."), 5)
+
+
+@bot.command()
+@is_owner_or_role()
+async def lb_queue(ctx):
+    await reply(ctx,
+        f"🔁 Offene Boards: {board_refresher.queue_depth} | "
+        f"Edits: {board_refresher.edits} | "
+        f"Gesparte Edits: {board_refresher.edits_saved} | "
+        f"Discord-Queue: {dispatcher.queue_depth}"
+    )
+
+@bot.command()
+@commands.guild_only()
+async def set_lb_channel(ctx):
+    data = guild_data(ctx.guild.id)
+    data.settings["lb_channel_id"] = ctx.channel.id
+    data.journal("setting", key="lb_channel_id", value=ctx.channel.id)
+
+    confirm = await reply(ctx, "✅ Leaderboard-Channel gesetzt")
+    delete_later(ctx.message, 2)
+    delete_later(confirm, 2)
+
+# ===== IMPORT =====
+
+IMPORT_MAX_BYTES = 8 * 1024 * 1024
+
+@bot.command()
+@commands.guild_only()
+async def link_steam(ctx, steam_id: str, member: discord.Member = None):
+    # Steam-ID (aus ACC-Resultaten) mit Discord-User verknüpfen
+    steam_id = steam_id.strip().lstrip("S")
+    if not steam_id.isdigit():
+        await reply(ctx, "❌ Format: !link_steam 76561198000000000")
+        return
+
+    target = member or ctx.author
+    if target.id != ctx.author.id and not await is_owner_or_role().predicate(ctx):
+        await reply(ctx, "❌ Nur Event coordinator dürfen andere Fahrer verknüpfen.")
+        return
+
+    data = guild_data(ctx.guild.id)
+    steam_ids = {**data.settings.get("steam_ids", {}), steam_id: str(target.id)}
+    data.settings["steam_ids"] = steam_ids
+    data.journal("setting", key="steam_ids", value=steam_ids)
+
+    delete_later(await reply(ctx, f"✅ Steam-ID mit {target.display_name} verknüpft"), 5)
+
+@bot.command()
+@commands.guild_only()
+@is_owner_or_role()
+async def import_laps(ctx, mode: str = ""):
+    # ACC-Resultate (.json) oder CSV (track,driver,time[,date]) als Anhang
+    files = []
+    for attachment in ctx.message.attachments:
+        if attachment.size > IMPORT_MAX_BYTES:
+            await reply(ctx, f"❌ {attachment.filename} ist zu groß (max. 8 MB).")
+            return
+        files.append((attachment.filename, await attachment.read()))
+
+    if not files:
+        await reply(ctx, "❌ Keine Datei angehängt. `!import_laps` + ACC .json oder .csv (`!import_laps check` = nur prüfen)")
+        return
+
+    data = guild_data(ctx.guild.id)
+
+    # Parsen + Validieren im Thread, der Event-Loop bleibt frei
+    with metrics.timer("import_seconds", stage="parse"):
+        result = await asyncio.to_thread(
+            importer.parse_files, files, data.settings.get("steam_ids", {}),
+            tracks.resolve, time_to_seconds
+        )
+
+    notes = []
+    if result.skipped:
+        notes.append(f"{result.skipped} Runden übersprungen (ungültig/unbekannter Fahrer)")
+    if result.unknown_drivers:
+        notes.append(f"{len(result.unknown_drivers)} Steam-IDs ohne Verknüpfung (`!link_steam`)")
+    notes = (" | " + " | ".join(notes)) if notes else ""
+
+    # Fehler -> gar nichts übernehmen
+    if result.error_count:
+        lines = "\n".join(result.errors)
+        more = result.error_count - len(result.errors)
+        if more:
+            lines += f"\n… und {more} weitere"
+        await reply(ctx, f"❌ Import abgebrochen, {result.error_count} Fehler:\n```{lines[:1800]}```")
+        return
+
+    if not result.laps:
+        await reply(ctx, "❌ Keine Runden gefunden." + notes)
+        return
+
+    affected = sorted({track for track, _, _, _ in result.laps})
+    if mode.lower() == "check":
+        await reply(ctx, f"🔎 {len(result.laps)} Runden auf {len(affected)} Tracks gültig." + notes)
+        return
+
+    # --- Anwenden: alles in einem Rutsch, ein Journal-Eintrag ---
+    with metrics.timer("import_seconds", stage="apply"):
+        improved = 0
+        for track, user_id, ms, ts in result.laps:
+            data.history(track).add(user_id, ms, ts)
+            if data.board(track).submit(user_id, ms / 1000):
+                data.board_changed(track)
+                improved += 1
+
+        data.journal("import", laps=result.laps)
+
+    # jedes betroffene Board genau einmal neu rendern
+    for track in affected:
+        page_cache.drop((ctx.guild.id, track))
+        if track in data.leaderboard_messages:
+            board_refresher.mark_dirty((ctx.guild.id, track))
+
+    metrics.inc("imported_laps_total", len(result.laps))
+    await reply(ctx,
+        f"✅ {len(result.laps)} Runden importiert ({improved} neue Bestzeiten) "
+        f"auf {len(affected)} Tracks: {', '.join(t.title() for t in affected)}" + notes
+    )
+
+# ===== STATISTIK =====
+
+def format_ms(ms):
+    return seconds_to_time(ms / 1000)
+
+
+async def resolve_stats_track(ctx, track_raw):
+    track = tracks.resolve(track_raw)
+    if track is None:
+        await track_not_found(ctx, track_raw)
+        return None, None
+
+    history = guild_data(ctx.guild.id).histories.get(track)
+    if not history:
+        await reply(ctx, "❌ No times recorded for this track.")
+        return None, None
+
+    return track, history
+
+
+@bot.command()
+@commands.guild_only()
+async def progress(ctx, member: typing.Optional[discord.Member] = None, *, track: str):
+    member = member or ctx.author
+    track, history = await resolve_stats_track(ctx, track)
+    if history is None:
+        return
+
+    laps = history.progression(member.id, limit=10)
+    if not laps:
+        await reply(ctx, f"❌ {member.display_name} hat auf {track.title()} noch keine Runde.")
+        return
+
+    lines = [
+        f"<t:{ts}:d> {format_ms(ms)}" + (" ⭐" if ms == best else f" (Best {format_ms(best)})")
+        for ts, ms, best in laps
+    ]
 
     embed = discord.Embed(
-        title=f"🏁 {track.title()} Leaderboard",
-        description=description,
+        title=f"📈 {member.display_name} — {track.title()}",
+        description="\n".join(lines),
         color=discord.Color.red()
     )
+    embed.set_footer(text=f"Letzte {len(laps)} von {history.driver(member.id).count} Runden")
+    await reply(ctx, embed=embed)
+
+
+@bot.command()
+@commands.guild_only()
+async def consistency(ctx, member: typing.Optional[discord.Member] = None, *, track: str):
+    member = member or ctx.author
+    track, history = await resolve_stats_track(ctx, track)
+    if history is None:
+        return
+
+    stats = history.driver(member.id)
+    if stats is None:
+        await reply(ctx, f"❌ {member.display_name} hat auf {track.title()} noch keine Runde.")
+        return
+
+    await reply(ctx,
+        f"🎯 **{member.display_name}** auf {track.title()}: {stats.count} Runden | "
+        f"Best {format_ms(stats.best)} | Ø {format_ms(round(stats.mean))} | "
+        f"σ {stats.stdev / 1000:.3f}s"
+    )
+
+
+@bot.command()
+@commands.guild_only()
+async def percentiles(ctx, *, track: str):
+    track, history = await resolve_stats_track(ctx, track)
+    if history is None:
+        return
+
+    values = history.percentiles()
+    lines = [f"P{p}: {format_ms(ms)}" for p, ms in values.items()]
 
-    await ctx.send(embed=embed)
+    embed = discord.Embed(
+        title=f"📊 {track.title()} — Rundenzeiten",
+        description="\n".join(lines),
+        color=discord.Color.red()
+    )
+    embed.set_footer(text=f"{len(history)} Runden von {len(history.drivers)} Fahrern")
+    await reply(ctx, embed=embed)
 
 
 @bot.command()
-async def setup_lb(ctx, *, track: str):
+@commands.guild_only()
+async def improvers(ctx, days: typing.Optional[int] = None, *, track: str):
+    track, history = await resolve_stats_track(ctx, track)
+    if history is None:
+        return
 
-    # Track normalisieren
-    track = normalize_track(track)
+    since = None
+    if days:
+        since = int((datetime.now(timezone.utc) - timedelta(days=days)).timestamp())
 
-    # Alias prüfen
-    if track in TRACK_ALIASES:
-        track = TRACK_ALIASES[track]
-    else:
-        await ctx.send("❌ Track nicht erkannt.")
+    top = history.improvers(limit=5, since=since)
+    if not top:
+        await reply(ctx, "❌ Noch keine Verbesserungen.")
         return
 
-    # Leaderboard Embed erstellen
+    names = await driver_names.resolve(ctx.guild, [uid for uid, _ in top])
+    lines = [
+        f"#{pos} {names.get(str(uid)) or f'<@{uid}>'} — -{gain / 1000:.3f}s"
+        for pos, (uid, gain) in enumerate(top, 1)
+    ]
+
+    period = f"letzte {days} Tage" if days else "gesamt"
     embed = discord.Embed(
-        title=f"🏁 {track.title()} Leaderboard",
-        description="Noch keine Zeiten",
+        title=f"🚀 Top Improver {track.title()} ({period})",
+        description="\n".join(lines),
         color=discord.Color.red()
     )
+    await reply(ctx, embed=embed)
 
-    # Leaderboard posten
-    leaderboard_msg = await ctx.send(embed=embed)
+# ===== MEISTERSCHAFT =====
 
-    # Message speichern
-    leaderboard_messages[track] = {
-        "channel_id": ctx.channel.id,
-        "message_id": leaderboard_msg.id
-    }
+STANDINGS_ROWS = 15
 
-    # In data.json speichern
-    save_data()
+@bot.command()
+@commands.guild_only()
+async def standings(ctx, *, name: str = ""):
+    data = guild_data(ctx.guild.id)
+    name = name.strip().lower() or next(iter(data.championships), "")
+
+    championship = data.championships.get(name)
+    if championship is None:
+        available = ", ".join(data.championships) or "-"
+        await reply(ctx, f"❌ Meisterschaft nicht gefunden. Verfügbar: {available}")
+        return
 
-    # kurze Bestätigung senden
-    confirm = await ctx.send(f"✅ Leaderboard für {track} erstellt")
+    # fertig gepflegte Wertung, nur die Top-N lesen
+    top = championship.standings.top(STANDINGS_ROWS)
+    if not top:
+        await reply(ctx, "❌ Noch keine Punkte vergeben.")
+        return
 
-    await asyncio.sleep(2)
+    names = await driver_names.resolve(ctx.guild, [uid for uid, _ in top])
+    lines = [
+        f"#{pos} {names.get(uid) or f'<@{uid}>'} — {points} Pkt"
+        for pos, (uid, points) in enumerate(top, 1)
+    ]
 
-    # setup command löschen
-    try:
-        await ctx.message.delete()
-    except:
-        pass
+    tracks_text = ", ".join(t.title() for t in sorted(championship.tracks)) if championship.tracks else "alle Tracks"
+    embed = discord.Embed(
+        title=f"🏆 Meisterschaft: {name.title()}",
+        description="\n".join(lines),
+        color=discord.Color.gold()
+    )
+    embed.set_footer(text=f"{tracks_text} | Punkte: {'-'.join(map(str, championship.points))}")
+    await reply(ctx, embed=embed)
 
-    # Bestätigung löschen
-    try:
-        await confirm.delete()
-    except:
-        pass
 
 @bot.command()
+@commands.guild_only()
 @is_owner_or_role()
-async def setup_all_lb(ctx):
+async def championship(ctx, action: str = "", name: str = "", *, options: str = ""):
+    data = guild_data(ctx.guild.id)
+    usage = "❌ Nutzung: !championship set <name> [points:25,18,15] [tracks:monza,spa] | !championship remove <name>"
+    config = {n: c.to_json() for n, c in data.championships.items()}
+    name = name.lower()
+
+    if action == "":
+        lines = [
+            f"**{n}** — {'-'.join(map(str, c['points']))} | "
+            f"{', '.join(c['tracks']) if c['tracks'] else 'alle Tracks'}"
+            for n, c in config.items()
+        ]
+        await reply(ctx, "\n".join(lines) or "Keine Meisterschaften.")
+        return
 
-    created = 0
+    if action == "set" and name:
+        entry = dict(config.get(name, {"points": None, "tracks": None}))
+
+        # "points:25,18,15 tracks:monza, spa francorchamps"
+        parts = re.split(r"\b(points|tracks):", options)
+        for key, value in zip(parts[1::2], parts[2::2]):
+            values = [v.strip() for v in value.split(",") if v.strip()]
+            if key == "points":
+                if not values or not all(v.isdigit() for v in values):
+                    await reply(ctx, "❌ points: nur ganze Zahlen, z.B. points:25,18,15")
+                    return
+                entry["points"] = [int(v) for v in values]
+            else:
+                resolved = []
+                for value in values:
+                    track = tracks.resolve(value)
+                    if track is None:
+                        await track_not_found(ctx, value)
+                        return
+                    resolved.append(track)
+                entry["tracks"] = resolved or None
+        config[name] = entry
+
+    elif action == "remove" and name in config:
+        del config[name]
+    else:
+        await reply(ctx, usage)
+        return
 
-    for track in track_images.keys():
+    data.settings["championships"] = config
+    data.journal("setting", key="championships", value=config)
+    data.rebuild_championships()
 
-        track = track.strip().lower()
+    await reply(ctx, f"✅ Meisterschaften: {', '.join(data.championships) or '-'}")
 
-        # wenn schon existiert → skip
-        if track in leaderboard_messages:
-            continue
+# ===== SLASH COMMANDS =====
+#
+# Gleiche Logik wie die !-Commands, aber Antworten nur für den Aufrufer
+# (ephemeral) -> nichts muss hinterher gelöscht werden.
 
-        embed = discord.Embed(
-            title=f"🏁 {track.title()} Leaderboard",
-            description="Noch keine Zeiten",
-            color=discord.Color.red()
-        )
+async def track_autocomplete(interaction: discord.Interaction, current: str):
+    # reiner Dict-Lookup im Prefix-Index (tracks.py), weit unter 3s
+    with metrics.timer("autocomplete_seconds"):
+        return [app_commands.Choice(name=t.title(), value=t) for t in tracks.complete(current)]
 
-        msg = await ctx.send(embed=embed)
 
-        leaderboard_messages[track] = {
-            "channel_id": ctx.channel.id,
-            "message_id": msg.id
-        }
+@bot.tree.command(name="race", description="Race-Event mit Anmeldung erstellen")
+@app_commands.guild_only()
+@app_is_owner_or_role()
+@app_commands.describe(date="TT.MM.JJJJ", time="HH:MM", track="Track", info="Zusatzinfos (optional)")
+@app_commands.autocomplete(track=track_autocomplete)
+async def slash_race(interaction: discord.Interaction, date: str, time: str, track: str, info: str = None):
+    # Race-Post läuft über die REPLY-Queue und kann warten -> erst bestätigen (3s)
+    await respond(interaction.response.defer, ephemeral=True)
+
+    text = f"{track} | {info}" if info else track
+    try:
+        await post_race(interaction.channel, interaction.guild_id, date, time, text)
+    except ValueError:
+        await respond(interaction.followup.send, "❌ Datum/Zeit: 24.12.2025 20:00", ephemeral=True)
+        return
+
+    await respond(interaction.followup.send, "✅ Race erstellt", ephemeral=True)
+
+
+@bot.tree.command(name="hotlap", description="Rundenzeit eintragen")
+@app_commands.guild_only()
+@app_commands.describe(track="Track", time="Rundenzeit, z.B. 1:47.221")
+@app_commands.autocomplete(track=track_autocomplete)
+async def slash_hotlap(interaction: discord.Interaction, track: str, time: str):
+    track_raw = track
+    track = tracks.resolve(track_raw)
+    if track is None:
+        guild_data(interaction.guild_id).log("lap_rejected", input=f"{track_raw} | {time}", reason="track")
+        await respond(interaction.response.send_message, track_not_found_text(track_raw), ephemeral=True)
+        return
+
+    seconds = time_to_seconds(time.strip())
+    if seconds is None:
+        guild_data(interaction.guild_id).log("lap_rejected", input=f"{track_raw} | {time}", reason="time")
+        await respond(interaction.response.send_message, "❌ Invalid time format. Use: 1:47.221", ephemeral=True)
+        return
+
+    _, text = record_lap(interaction.guild_id, str(interaction.user.id), track, seconds)
+    if track not in guild_data(interaction.guild_id).leaderboard_messages:
+        text += "\n❌ Leaderboard nicht eingerichtet. Admin: /setup_lb"
+
+    await respond(interaction.response.send_message, text, ephemeral=True)
+
+
+@bot.tree.command(name="leaderboard", description="Leaderboard eines Tracks anzeigen")
+@app_commands.guild_only()
+@app_commands.autocomplete(track=track_autocomplete)
+async def slash_leaderboard(interaction: discord.Interaction, track: str):
+    track_raw = track
+    track = tracks.resolve(track_raw)
+    if track is None:
+        await respond(interaction.response.send_message, track_not_found_text(track_raw), ephemeral=True)
+        return
+
+    if not guild_data(interaction.guild_id).leaderboards.get(track):
+        await respond(interaction.response.send_message, "❌ No times recorded for this track.", ephemeral=True)
+        return
+
+    # wie LeaderboardView.show: Seite/Karte erst nach dem Bestätigen bauen
+    await respond(interaction.response.defer, ephemeral=True)
+    embed, _ = await render_page(interaction.guild, track, 0)
+    files = await page_card(interaction.guild, track, 0, embed)
+    await respond(interaction.followup.send,
+        embed=embed, files=files, view=LeaderboardView(interaction.guild, track), ephemeral=True
+    )
+
+
+@bot.tree.command(name="setup_lb", description="Leaderboard für einen Track in diesem Channel anlegen")
+@app_commands.guild_only()
+@app_is_owner_or_role()
+@app_commands.autocomplete(track=track_autocomplete)
+async def slash_setup_lb(interaction: discord.Interaction, track: str):
+    track_raw = track
+    track = tracks.resolve(track_raw)
+    if track is None:
+        await respond(interaction.response.send_message, track_not_found_text(track_raw), ephemeral=True)
+        return
+
+    # wie /race: Board-Post kann in der REPLY-Queue warten
+    await respond(interaction.response.defer, ephemeral=True)
+    await create_board(interaction.channel, interaction.guild_id, track)
+    await respond(interaction.followup.send, f"✅ Leaderboard für {track} erstellt", ephemeral=True)
+
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error):
+    command = interaction.command.name if interaction.command else "unknown"
+    metrics.inc("command_errors_total", command=f"/{command}")
+
+    if isinstance(error, app_commands.CheckFailure):
+        text = "❌ Only authorized roles can use this command."
+    else:
+        print(f"❌ /{command}: {error}")
+        text = "❌ Da ist etwas schiefgelaufen."
+
+    if interaction.response.is_done():
+        await respond(interaction.followup.send, text, ephemeral=True)
+    else:
+        await respond(interaction.response.send_message, text, ephemeral=True)
 
-        created += 1
 
 @bot.command()
-async def set_lb_channel(ctx):
-    settings["lb_channel_id"] = ctx.channel.id
+@commands.check(lambda ctx: ctx.author.id == BOT_OWNER_ID)
+async def sync_commands(ctx):
+    # Slash-Commands bei Discord registrieren (nur nach Änderungen nötig)
+    synced = await bot.tree.sync()
+    await reply(ctx, f"✅ {len(synced)} Slash-Commands synchronisiert")
 
-    confirm = await ctx.send("✅ Leaderboard-Channel gesetzt")
-    await asyncio.sleep(2)
+# ===== TRACK KATALOG =====
 
-    try:
-        await ctx.message.delete()
-    except:
-        pass
+@bot.command()
+@commands.check(lambda ctx: ctx.author.id == BOT_OWNER_ID)
+async def reload_tracks(ctx):
+    global tracks
 
+    # neuen Katalog komplett bauen, erst dann tauschen
     try:
-        await confirm.delete()
-    except:
-        pass
+        catalog = await asyncio.to_thread(TrackCatalog.from_file, TRACKS_FILE)
+    except (OSError, ValueError) as e:
+        await reply(ctx, f"❌ tracks.json nicht geladen, alter Katalog bleibt aktiv: {e}")
+        return
+
+    # Boards/Zeiten hängen am Tracknamen -> die dürfen nicht verschwinden
+    # (geprüft werden die geladenen Guilds)
+    in_use = set()
+    for data in guilds.loaded():
+        in_use.update(data.leaderboards)
+        in_use.update(data.leaderboard_messages)
+
+    lost = sorted(in_use - set(catalog.names()))
+    if lost:
+        await reply(ctx, f"❌ Tracks mit Daten fehlen in tracks.json: {', '.join(lost)}")
+        return
+
+    added = sorted(set(catalog.names()) - set(tracks.names()))
+    removed = sorted(set(tracks.names()) - set(catalog.names()))
+
+    # ein Name, ein Tausch: laufende Commands sehen alt oder neu, nie halb
+    tracks = catalog
+    metrics.inc("track_reloads_total")
+
+    await reply(ctx,
+        f"✅ {len(catalog.names())} Tracks geladen"
+        + (f" | neu: {', '.join(added)}" if added else "")
+        + (f" | entfernt: {', '.join(removed)}" if removed else "")
+    )
 
 # ===== SAY =====
 
 @bot.command()
 @commands.check(lambda ctx: ctx.author.id == BOT_OWNER_ID)  # Nur du darfst diesen Befehl nutzen
 async def say(ctx, *, text: str):
-    msg = await ctx.send(text)      # Bot sendet zuerst
-    try:
-        await ctx.message.delete()  # dann löscht er deine Nachricht
-    except:
-        pass
+    msg = await reply(ctx, text)      # Bot sendet zuerst
+    dispatcher.fire(DELETE, "delete", ctx.channel.id, ctx.message.delete)  # dann löscht er deine Nachricht
+
+# ===== STATS =====
+
+@bot.command()
+@commands.check(lambda ctx: ctx.author.id == BOT_OWNER_ID)
+async def stats(ctx):
+    def line(name, hist):
+        return f"`{name}` n={hist.count} p50≤{hist.quantile(0.5) * 1000:.0f}ms p99≤{hist.quantile(0.99) * 1000:.0f}ms"
+
+    def section(metric, label):
+        rows = [
+            line(dict(key)[label], hist)
+            for key, hist in sorted(metrics.histograms.get(metric, {}).items())
+        ]
+        return "\n".join(rows) or "-"
+
+    embed = discord.Embed(title="📊 PitBoss Stats", color=discord.Color.blue())
+    embed.add_field(name="Commands", value=section("command_seconds", "command"), inline=False)
+    embed.add_field(name="Storage", value=section("storage_seconds", "op"), inline=False)
+    embed.add_field(name="Discord API", value=section("discord_api_seconds", "call"), inline=False)
+
+    rsvp = metrics.histogram("rsvp_seconds")
+    embed.add_field(name="RSVP", value=line("ack", rsvp) if rsvp else "-", inline=False)
+
+    rate_limited = sum(metrics.counters.get("rate_limited_total", {}).values())
+    errors = sum(metrics.counters.get("command_errors_total", {}).values())
+    embed.add_field(name="429s", value=str(rate_limited))
+    embed.add_field(name="Fehler", value=str(errors))
+    embed.add_field(name="Uptime", value=f"{(time.monotonic() - STARTED_AT) / 3600:.1f}h")
+
+    instance = f"{socket.gethostname()} | pid:{os.getpid()} | boot:{BOOT_ID}"
+    embed.set_footer(text=f"PitBoss Systems • {instance}")
+
+    await reply(ctx, embed=embed)
 
 # ===== HELP =====
 
@@ -634,6 +1468,30 @@ async def help(ctx):
         inline=False
     )
 
+    embed.add_field(
+        name="📊 STATS",
+        value=
+        "`!progress [@driver] [track]`\n"
+        "Last laps + best time progression\n\n"
+        "`!consistency [@driver] [track]`\n"
+        "Average and spread of all laps\n\n"
+        "`!percentiles [track]`\n"
+        "Lap time distribution\n\n"
+        "`!improvers [days] [track]`\n"
+        "Biggest improvements\n\n"
+        "`!standings [championship]`\n"
+        "Championship points across tracks",
+        inline=False
+    )
+
+    embed.add_field(
+        name="⚡ SLASH",
+        value=
+        "`/race` `/hotlap` `/leaderboard` `/setup_lb`\n"
+        "Same as above, with track autocomplete",
+        inline=False
+    )
+
     embed.add_field(
         name="🛠 UTILITY",
         value=
@@ -644,88 +1502,445 @@ async def help(ctx):
 
     embed.set_footer(text="PitBoss Racing System")
 
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=embed)
 
 @bot.command()
+@commands.guild_only()
 @is_owner_or_role()
-async def cleanup_events(ctx, limit: int = 50):
+async def cleanup_events(ctx, *, filters: str = ""):
     """
-    Löscht bis zu 'limit' letzte Bot-Nachrichten im aktuellen Channel,
-    die wie Race-Events aussehen (title enthält "It's Race Time").
-    Nutzung: !cleanup_events 50
+    Löscht Race-Event-Posts des Bots im aktuellen Channel - direkt über die
+    gespeicherten Message-IDs, ohne die Channel-History zu durchsuchen.
+    Nutzung: !cleanup_events [anzahl] [past] [track:monza] [days:7]
+      anzahl   = höchstens so viele (neueste zuerst)
+      past     = nur Events, deren Rennen vorbei ist
+      track:x  = nur Events auf diesem Track
+      days:n   = nur Posts, die älter als n Tage sind
     """
-    deleted = 0
+    data = guild_data(ctx.guild.id)
+    now = datetime.now(timezone.utc)
+
+    limit = None
+    past_only = False
+    track = None
+    min_age = None
+
+    for part in filters.split():
+        key, _, value = part.partition(":")
+        if part.isdigit():
+            limit = int(part)
+        elif part.lower() == "past":
+            past_only = True
+        elif key.lower() == "track" and value:
+            track = tracks.resolve(value.replace("_", " "))
+            if track is None:
+                await track_not_found(ctx, value)
+                return
+        elif key.lower() == "days" and value.isdigit():
+            min_age = timedelta(days=int(value))
+        else:
+            await reply(ctx, "❌ Nutzung: !cleanup_events [anzahl] [past] [track:monza] [days:7]")
+            return
 
-    async for msg in ctx.channel.history(limit=limit):
-        if msg.author != bot.user:
+    # Kandidaten nur aus dem Index (neueste zuerst)
+    selected = []
+    for message_id in sorted(data.race_events, key=int, reverse=True):
+        event = data.race_events[message_id]
+        if event.get("channel_id") != ctx.channel.id:
+            continue
+        if past_only and event["timestamp"] > now.timestamp():
             continue
-        if not msg.embeds:
+        if track and tracks.find_in(event["track"]) != track:
             continue
+        posted = discord.utils.snowflake_time(int(message_id))
+        if min_age and now - posted < min_age:
+            continue
+        selected.append((message_id, posted))
+        if limit is not None and len(selected) >= limit:
+            break
+
+    # < 14 Tage: Bulk-Delete (100 pro Call), ältere einzeln aber parallel
+    bulk_cutoff = now - timedelta(days=14) + timedelta(minutes=5)
+    young = [discord.Object(id=int(mid)) for mid, posted in selected if posted > bulk_cutoff]
+    old = [int(mid) for mid, posted in selected if posted <= bulk_cutoff]
+
+    # Deletes laufen mit niedrigster Priorität -> Antworten anderer User
+    # werden währenddessen vorgezogen
+    async def delete_one(message_id):
+        try:
+            message = ctx.channel.get_partial_message(message_id)
+            await dispatcher.call(DELETE, "delete", ctx.channel.id, message.delete)
+        except discord.NotFound:
+            pass  # schon weg -> trotzdem aus dem Index
+        except discord.HTTPException:
+            return False
+        return True
+
+    for i in range(0, len(young), 100):
+        chunk = young[i:i + 100]
+        try:
+            await dispatcher.call(DELETE, "bulk_delete", ctx.channel.id, ctx.channel.delete_messages, chunk)
+        except discord.HTTPException:
+            # z.B. fehlende Rechte -> einzeln versuchen
+            old += [m.id for m in chunk]
 
-        title = (msg.embeds[0].title or "").lower()
-        if "its race time !" in title or "race time" in title:
-            try:
-                await msg.delete()
-                deleted += 1
-            except:
-                pass
+    results = await asyncio.gather(*(delete_one(mid) for mid in old))
+    failed = {mid for mid, ok in zip(old, results) if not ok}
+
+    deleted = 0
+    for message_id, _ in selected:
+        if int(message_id) in failed:
+            continue
+        data.race_events.pop(message_id, None)
+        data.journal("event_removed", message_id=message_id)
+        race_embed_bases.pop(message_id, None)
+        scheduler.cancel_where(message_id=message_id)
+        deleted += 1
+
+    confirm = await reply(ctx, f"✅ {deleted} Event-Nachrichten gelöscht.")
+    delete_later(ctx.message, 2)
+    delete_later(confirm, 2)
+
+
+# ================= EVENTS =================
 
-    confirm = await ctx.send(f"✅ {deleted} Event-Nachrichten gelöscht.")
-    await asyncio.sleep(2)
+@bot.event
+async def setup_hook():
+    global rsvp_view
+
+    # Persistente View: Buttons alter Race-Posts funktionieren nach Neustart
+    rsvp_view = RSVPView()
+    bot.add_view(rsvp_view)
+
+    # Deploy / Container-Stop schicken SIGTERM -> wie Ctrl-C sauber beenden
+    # (Journal schreiben, Lease freigeben), statt mitten im Flush zu sterben
     try:
-        await ctx.message.delete()
-        await confirm.delete()
-    except:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, on_sigterm)
+    except NotImplementedError:  # Windows: kein add_signal_handler
         pass
 
+    # Prometheus-Endpoint (METRICS_PORT=0 schaltet ihn ab)
+    port = int(os.getenv("METRICS_PORT", "9108"))
+    if port:
+        try:
+            await metrics.serve("127.0.0.1", port)
+            print(f"📊 Metrics auf http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            print(f"⚠️ Metrics-Endpoint nicht gestartet: {e}")
+
+
+def on_sigterm():
+    print("🛑 SIGTERM -> fahre herunter")
+    asyncio.get_running_loop().create_task(bot.close())
+
+
+async def shutdown():
+    if leader_task is not None:
+        leader_task.cancel()
+
+    if is_leader:
+        await board_refresher.flush()
+        await rsvp_refresher.flush()
+        await scheduler.close()
+        await asyncio.to_thread(scheduler.store.close)
+
+        # schon eingereihte Requests (z.B. Deletes) noch rausschicken
+        try:
+            await asyncio.wait_for(dispatcher.drain(), 10)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {dispatcher.queue_depth} Discord-Requests verworfen")
+    await dispatcher.close()
+
+    # Writer-Thread leeren, ohne den Event-Loop zu blockieren
+    await asyncio.to_thread(guilds.close)
+    print("💾 Daten gespeichert")
+
+    # erst nach dem Schreiben freigeben -> Standby übernimmt sofort
+    if is_leader:
+        await asyncio.to_thread(lease.release)
+
+
+# ===== LEADER =====
+
+async def promote():
+    global is_leader, leader_epoch
+    is_leader = True
+    leader_epoch = lease.epoch
+    metrics.inc("leader_changes_total", role="leader")
+    print(f"👑 Leader (epoch {lease.epoch}) | boot:{BOOT_ID}")
+
+    migrate_legacy_data()
+
+    # offene Jobs vom letzten Leader übernehmen
+    scheduler.load()
+    scheduler.start()
+
+
+async def demote():
+    global is_leader
+    is_leader = False
+    metrics.inc("leader_changes_total", role="standby")
+    print(f"⚠️ Lease verloren -> Standby | boot:{BOOT_ID}")
+
+    # nichts mehr rendern/ausführen, was der neue Leader selbst macht
+    await scheduler.close()
+    await board_refresher.discard()
+    await rsvp_refresher.discard()
+
+    # Geschriebenes abschließen, Cache verwerfen (neuer Leader schreibt weiter)
+    await asyncio.to_thread(scheduler.store.close)
+    detached = guilds.detach()
+
+    def close_detached():
+        for data in detached:
+            data.close()
+
+    await asyncio.to_thread(close_detached)
+
+
+async def leader_loop():
+    while True:
+        try:
+            held = await asyncio.to_thread(lease.try_acquire)
+        except OSError as e:
+            print(f"⚠️ Lease nicht lesbar/schreibbar: {e}")
+            held = lease.held  # bis zum Ablauf weiter gültig
+
+        if is_leader and (not held or lease.epoch != leader_epoch):
+            await demote()
+        if held and not is_leader:
+            await promote()
+
+        await asyncio.sleep(lease.ttl / 3)
+
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+    event_context.set({"cmd": ctx.command.name, "by": str(ctx.author.id)})
+
+
+def trace_value(value):
+    # Command-Argumente für den Trace: Member/Channel nur als ID
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "id"):
+        return {"id": value.id}
+    return str(value)
+
+
+@bot.after_invoke
+async def stop_command_timer(ctx):
+    started_at = getattr(ctx, "started_at", None)
+    if started_at is not None:
+        elapsed = time.perf_counter() - started_at
+        metrics.observe("command_seconds", elapsed, command=ctx.command.name)
+
+        # Trace nur für Guilds, die der Command ohnehin geladen hat
+        if ctx.guild is not None and ctx.guild.id in guilds:
+            guild_data(ctx.guild.id).log(
+                "command", name=ctx.command.name, channel=ctx.channel.id,
+                args=[trace_value(arg) for arg in ctx.args[1:]],
+                kwargs={key: trace_value(value) for key, value in ctx.kwargs.items()},
+                failed=ctx.command_failed, ms=round(elapsed * 1000, 3)
+            )
 
-# ================= EVENTS =================
 
 @bot.event
-async def on_ready():
-    print(f"✅ Bot online: {bot.user} | boot:{BOOT_ID}")
+async def on_app_command_completion(interaction, command):
+    started_at = interaction.extras.get("started_at")
+    if started_at is not None and interaction.guild_id is not None and interaction.guild_id in guilds:
+        guild_data(interaction.guild_id).log(
+            "slash", name=command.name, channel=interaction.channel_id,
+            kwargs={key: trace_value(value) for key, value in interaction.namespace},
+            ms=round((time.perf_counter() - started_at) * 1000, 3)
+        )
 
-    # Persistenz laden (wichtig: lädt auch leaderboard_messages)
-    load_data()
 
-    await asyncio.sleep(3)  # warten bis Discord komplett ready ist
+async def check_board_link(link, limit):
+    # True = Message existiert noch, False = weg, None = unklar (Fehler)
+    channel = bot.get_channel(link["channel_id"])
+    if channel is None:
+        return False
+
+    async with limit:
+        try:
+            with metrics.timer("discord_api_seconds", call="fetch_message"):
+                await dispatcher.call(BOARD, "fetch_message", channel.id, channel.fetch_message, link["message_id"])
+            return True
+        except discord.NotFound:
+            return False
+        except discord.HTTPException:
+            return None
 
-    lb_channel_id = settings.get("lb_channel_id")
+
+async def scan_for_boards(data, missing):
+    # Fallback: nur für fehlende Tracks die Channel-History durchsuchen
+    lb_channel_id = data.settings.get("lb_channel_id")
     if not lb_channel_id:
-        print("⚠️ Kein Leaderboard Channel gesetzt (nutze !set_lb_channel)")
-        return
+        return 0
 
     channel = bot.get_channel(lb_channel_id)
     if not channel:
-        print("❌ Leaderboard Channel nicht gefunden")
-        return
+        print(f"❌ Leaderboard Channel von Guild {data.guild_id} nicht gefunden")
+        return 0
 
-    # vorhandene Leaderboard-Embeds aus dem Channel wiederfinden
-    messages = [m async for m in channel.history(limit=200)]
     found = 0
 
-    for msg in messages:
+    async for msg in channel.history(limit=200):
         if msg.author != bot.user or not msg.embeds:
             continue
 
-        title = msg.embeds[0].title or ""
-        if "leaderboard" not in title.lower():
+        # eine Message kann bis zu 10 Boards enthalten (setup_all_lb)
+        for slot, embed in enumerate(msg.embeds):
+            title = embed.title or ""
+            if "leaderboard" not in title.lower():
+                continue
+
+            track = title.lower().replace("🏁", "").replace("leaderboard", "").strip()
+            if missing is not None and track not in missing:
+                continue
+
+            link = {"channel_id": channel.id, "message_id": msg.id}
+            if len(msg.embeds) > 1:
+                link["slot"] = slot
+
+            data.leaderboard_messages[track] = link
+            data.journal("board", track=track, **link)
+            found += 1
+
+            if missing is not None:
+                missing.discard(track)
+
+        if missing is not None and not missing:
+            break
+
+    return found
+
+
+async def verify_board_links(data):
+    # gespeicherte Links parallel prüfen - jede Message nur einmal
+    limit = asyncio.Semaphore(5)
+    messages = {}
+    for track, link in data.leaderboard_messages.items():
+        messages.setdefault(link["message_id"], (link, []))[1].append(track)
+
+    results = await asyncio.gather(
+        *(check_board_link(link, limit) for link, _ in messages.values())
+    )
+
+    missing = set()
+    for (link, linked), ok in zip(messages.values(), results):
+        if ok is False:
+            for track in linked:
+                # nur den geprüften Link entfernen, nicht einen inzwischen neuen
+                if data.leaderboard_messages.get(track) is not link:
+                    continue
+                missing.add(track)
+                data.leaderboard_messages.pop(track)
+                data.journal("board_removed", track=track)
+
+    return missing
+
+
+async def relink_boards(data):
+    # gespeicherte Links parallel prüfen statt History zu scannen;
+    # setup_lb / setup_all_lb warten so lange (data.link_lock)
+    async with data.link_lock:
+        linked = list(data.leaderboard_messages)
+        missing = await verify_board_links(data)
+        missing_count = len(missing)  # scan_for_boards streicht gefundene aus `missing`
+
+        relinked = 0
+        if missing:
+            relinked = await scan_for_boards(data, missing)
+        elif not data.leaderboard_messages:
+            # noch gar kein Index (alte data.json) -> einmal alles suchen
+            relinked = await scan_for_boards(data, None)
+
+    print(
+        f"🔁 Guild {data.guild_id}: {len(linked) - missing_count} Leaderboards ok, "
+        f"{relinked} re-linked, {len(missing)} fehlen"
+    )
+
+
+def migrate_legacy_data():
+    # alte globale data.json/data.journal der Guild zuordnen, der ihr Channel gehört
+    if not (os.path.exists("data.json") or os.path.exists("data.journal")):
+        return
+
+    legacy = JournalStore("data.json", "data.journal")
+    state = legacy.load()
+
+    channel_ids = [state["settings"].get("lb_channel_id")]
+    channel_ids += [link["channel_id"] for link in state["messages"].values()]
+    channel_ids += [event["channel_id"] for event in state["events"].values()]
+
+    for channel_id in channel_ids:
+        channel = bot.get_channel(channel_id) if channel_id else None
+        if channel is None or channel.guild is None:
             continue
 
-        track = title.lower().replace("🏁", "").replace("leaderboard", "").strip()
+        # Der Ordner kann schon existieren (leer), wenn die Guild vorher
+        # geladen wurde - nur eigene Daten verhindern die Migration
+        guilds.forget(channel.guild.id)
+        target = os.path.join(guilds.root, str(channel.guild.id))
+        journal = os.path.join(target, "data.journal")
+        if os.path.exists(os.path.join(target, "data.json")) or (os.path.exists(journal) and os.path.getsize(journal) > 0):
+            print(f"⚠️ Alte data.json nicht migriert: {target} hat schon Daten")
+            return
+
+        had_log = os.path.exists(os.path.join(target, "events.log"))
+        os.makedirs(target, exist_ok=True)
+        for name in ("data.json", "data.journal"):
+            if os.path.exists(name):
+                os.replace(name, os.path.join(target, name))
+
+        # Event-Log gab es schon (nur Trace/Rejects) -> Stand als baseline nachtragen
+        if had_log:
+            data = guilds.get(channel.guild.id)
+            data.log("baseline", state=data.snapshot())
+
+        print(f"📦 Alte data.json nach {target} migriert")
+        return
+
+    print("⚠️ Alte data.json gefunden, aber keiner Guild zuordenbar")
 
-        leaderboard_messages[track] = {
-            "channel_id": channel.id,
-            "message_id": msg.id
-        }
-        found += 1
 
-    save_data()
-    print(f"🔁 {found} Leaderboards re-linked")
+@bot.event
+async def on_ready():
+    global startup_done, leader_task
+
+    print(f"✅ Bot online: {bot.user} | boot:{BOOT_ID} | shards:{bot.shard_count}")
+
+    # on_ready kommt bei jedem Reconnect erneut -> nur einmal pro Prozess
+    if startup_done:
+        return
+    startup_done = True
+
+    # erst jetzt (Channel-Cache gefüllt) um die Leader-Rolle bewerben
+    leader_task = asyncio.create_task(leader_loop())
+
+    # Guild-Daten werden erst beim ersten Zugriff geladen + geprüft
+    print(f"⏱️ Ready nach {time.monotonic() - STARTED_AT:.2f}s ({len(bot.guilds)} Guilds)")
+
+
+@bot.event
+async def on_member_update(before, after):
+    driver_names.invalidate(after.id)
+
+
+@bot.event
+async def on_user_update(before, after):
+    driver_names.invalidate(after.id)
 
 
 @bot.event
 async def on_command_error(ctx, error):
+    if isinstance(error, NotLeader):
+        return  # Standby: der Leader beantwortet den Command
+
+    metrics.inc("command_errors_total", command=ctx.command.name if ctx.command else "unknown")
 
     if isinstance(error, commands.CheckFailure):
 
@@ -733,7 +1948,7 @@ async def on_command_error(ctx, error):
             return
 
         if ctx.command and ctx.command.name == "race":
-            await ctx.send("❌ Only authorized roles can create events.")
+            await reply(ctx, "❌ Only authorized roles can create events.")
             return
 
         return
@@ -743,4 +1958,7 @@ async def on_command_error(ctx, error):
 
 # ================= TOKEN =================
 import os
-bot.run(os.getenv("TOKEN"))
+
+# nur beim direkten Start verbinden (bench.py importiert bot.py)
+if __name__ == "__main__":
+    bot.run(os.getenv("TOKEN"))
@@ -0,0 +1,323 @@
+import asyncio
+import functools
+import hashlib
+import io
+import os
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+try:
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+except ImportError:  # Pillow ist optional -> dann bleibt es bei Text-Boards
+    Image = None
+
+# ================= LEADERBOARD KARTEN =================
+#
+# Optionale PNG-Karten für Leaderboard-Seiten (Pillow), mit dem Trackbild
+# als Hintergrund. Karten liegen unter data/cards/<hash>.png:
+#
+#   Key  = Hash über (Track, Seite, Seiteninhalt, Trackbild-URL, Bild da?)
+#
+# Der Seiteninhalt kommt aus dem PageCache, der pro Board-Version
+# invalidiert wird - ein unverändertes Board ist also ein reiner
+# Cache-Treffer (kein Rendern, kein Download). Der Ordner ist ein LRU mit
+# Größenlimit (älteste Zugriffe fliegen zuerst, mtime = letzter Zugriff).
+# Der Index liegt im Speicher; jeder Plattenzugriff (Lesen, Schreiben,
+# Ordner scannen, Löschen) läuft per asyncio.to_thread neben dem Event-Loop.
+# Trackbilder werden einmal nach data/cards/art/ geladen und nie verdrängt.
+# Schlägt der Download fehl, wird ohne Hintergrund gerendert (eigener Key,
+# damit die Karte nach einem späteren Download neu entsteht) und erst nach
+# ART_RETRY Sekunden erneut geladen (verdoppelt sich bis ART_RETRY_MAX).
+
+CARD_WIDTH = 800
+HEADER_HEIGHT = 84
+ROW_HEIGHT = 34
+FOOTER_HEIGHT = 40
+
+PODIUM_COLORS = ((255, 200, 60), (200, 205, 215), (205, 127, 50))
+ACCENT = (231, 76, 60)  # discord.Color.red()
+FONT_FILES = ("DejaVuSans-Bold.ttf", "DejaVuSans.ttf", "arialbd.ttf", "Arial Bold.ttf")
+ART_TIMEOUT = 10
+ART_RETRY = 60
+ART_RETRY_MAX = 3600
+
+
+def available():
+    return Image is not None
+
+
+def card_key(*parts):
+    raw = "\x1f".join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+
+# ===== RENDERN (läuft im Thread) =====
+
+@functools.lru_cache(maxsize=None)
+def _font(size):
+    for name in FONT_FILES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1: nur feste Größe
+        return ImageFont.load_default()
+
+
+def _fit(draw, text, font, width):
+    # zu lange Namen mit … kürzen
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def _background(art_path, size):
+    width, height = size
+    if art_path is None:
+        return Image.new("RGB", size, (24, 26, 32))
+
+    with Image.open(art_path) as art:
+        art = art.convert("RGB")
+        # "cover": skalieren bis alles bedeckt ist, dann mittig zuschneiden
+        scale = max(width / art.width, height / art.height)
+        art = art.resize((max(width, round(art.width * scale)), max(height, round(art.height * scale))))
+        left = (art.width - width) // 2
+        top = (art.height - height) // 2
+        art = art.crop((left, top, left + width, top + height))
+
+    art = art.filter(ImageFilter.GaussianBlur(3))
+    shade = Image.new("RGB", size, (12, 12, 16))
+    return Image.blend(art, shade, 0.65)
+
+
+def render_card(title, rows, footer, art_path=None):
+    """rows = [(position, name, zeit)] -> PNG als bytes."""
+    height = HEADER_HEIGHT + ROW_HEIGHT * max(1, len(rows)) + FOOTER_HEIGHT
+    image = _background(art_path, (CARD_WIDTH, height))
+    draw = ImageDraw.Draw(image, "RGBA")
+
+    # Kopf
+    draw.rectangle((0, 0, CARD_WIDTH, HEADER_HEIGHT - 10), fill=(0, 0, 0, 110))
+    draw.rectangle((0, HEADER_HEIGHT - 14, CARD_WIDTH, HEADER_HEIGHT - 10), fill=ACCENT)
+    draw.text((24, (HEADER_HEIGHT - 14) // 2), _fit(draw, title, _font(30), CARD_WIDTH - 48), font=_font(30), fill="white", anchor="lm")
+
+    # Zeilen
+    font = _font(20)
+    for i, (position, name, lap_time) in enumerate(rows):
+        top = HEADER_HEIGHT + i * ROW_HEIGHT
+        middle = top + ROW_HEIGHT // 2
+        if i % 2 == 0:
+            draw.rectangle((12, top, CARD_WIDTH - 12, top + ROW_HEIGHT), fill=(255, 255, 255, 18))
+
+        color = PODIUM_COLORS[position - 1] if position <= len(PODIUM_COLORS) else (235, 235, 240)
+        draw.text((28, middle), f"#{position}", font=font, fill=color, anchor="lm")
+        draw.text((100, middle), _fit(draw, str(name), font, CARD_WIDTH - 300), font=font, fill=color, anchor="lm")
+        draw.text((CARD_WIDTH - 28, middle), lap_time, font=font, fill=color, anchor="rm")
+
+    if not rows:
+        draw.text((28, HEADER_HEIGHT + ROW_HEIGHT // 2), "Noch keine Zeiten", font=font, fill=(200, 200, 205), anchor="lm")
+
+    # Fuß
+    if footer:
+        draw.text((24, height - FOOTER_HEIGHT // 2), _fit(draw, footer, _font(15), CARD_WIDTH - 48), font=_font(15), fill=(170, 170, 180), anchor="lm")
+
+    out = io.BytesIO()
+    image.save(out, "PNG", compress_level=6)
+    return out.getvalue()
+
+
+# ===== CACHE =====
+
+class CardCache:
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, metrics=None):
+        self.directory = directory
+        self.art_directory = os.path.join(directory, "art")
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self._files = None  # OrderedDict { key: bytes_auf_platte }, ältester Zugriff zuerst
+        self._size = 0
+        self._pending = {}  # { key: Future } - gleiche Karte nur einmal rendern
+        self._art = {}      # { url: Future -> pfad | None } - jedes Bild nur einmal laden
+        self._art_failed = {}  # { url: (nächster_versuch, wartezeit) }
+        self.hits = 0
+        self.renders = 0
+        self.downloads = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".png")
+
+    def _scan(self):
+        # läuft im Thread: Index aus dem Ordner (nach letztem Zugriff sortiert)
+        os.makedirs(self.art_directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        return OrderedDict((key, size) for _, key, size in sorted(entries))
+
+    async def _ensure_loaded(self):
+        if self._files is None:
+            files = await asyncio.to_thread(self._scan)
+            if self._files is None:  # zwei gleichzeitige Scans -> der erste gilt
+                self._files = files
+                self._size = sum(files.values())
+
+    def _count(self, result):
+        if self.metrics is not None:
+            self.metrics.inc("card_cache_total", result=result)
+
+    # ===== LRU =====
+
+    def _read(self, key):
+        # läuft im Thread
+        with open(self._path(key), "rb") as f:
+            data = f.read()
+        os.utime(self._path(key))
+        return data
+
+    async def get(self, key):
+        await self._ensure_loaded()
+        if key not in self._files:
+            return None
+
+        try:
+            data = await asyncio.to_thread(self._read, key)
+        except FileNotFoundError:  # von Hand gelöscht
+            if key in self._files:
+                self._size -= self._files.pop(key)
+            return None
+
+        self._files.move_to_end(key)
+        self.hits += 1
+        self._count("hit")
+        return data
+
+    def _store(self, key, data):
+        # läuft im Thread (zusammen mit dem Rendern)
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+    def _add(self, key, size):
+        """Neue Karte in den Index. Gibt die verdrängten Keys zurück (Dateien
+        löscht _remove im Thread)."""
+        if key in self._files:
+            self._size -= self._files.pop(key)
+        self._files[key] = size
+        self._size += size
+
+        # älteste Karten verdrängen, bis das Limit passt (die neue bleibt immer)
+        evicted = []
+        while self._size > self.max_bytes and len(self._files) > 1:
+            old_key, old_size = self._files.popitem(last=False)
+            self._size -= old_size
+            evicted.append(old_key)
+        return evicted
+
+    def _remove(self, keys):
+        # läuft im Thread
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._files or ())
+
+    # ===== KARTEN =====
+
+    async def card(self, key, render, art_path=None):
+        """PNG für `key` aus dem Cache oder neu über render(art_path) im Thread.
+        art_path kommt aus artwork() und muss im Key stecken."""
+        data = await self.get(key)
+        if data is not None:
+            return data
+
+        # gleiche Karte wird gerade schon gerendert -> mitwarten
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        try:
+            def render_and_store():
+                png = render(art_path)
+                self._store(key, png)
+                return png
+
+            data = await asyncio.to_thread(render_and_store)
+            self.renders += 1
+            self._count("miss")
+            evicted = self._add(key, len(data))
+            future.set_result(data)
+            if evicted:
+                await asyncio.to_thread(self._remove, evicted)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # "never retrieved"-Warnung vermeiden, wenn keiner mitwartet
+            raise
+        finally:
+            del self._pending[key]
+
+    async def artwork(self, url):
+        """Trackbild einmalig herunterladen. Pfad oder None (kein Bild / Fehler)."""
+        if not url:
+            return None
+        await self._ensure_loaded()  # legt auch den art-Ordner an
+
+        # nach einem Fehler erst nach der Wartezeit wieder versuchen
+        failed = self._art_failed.get(url)
+        if failed is not None and time.monotonic() >= failed[0]:
+            self._art.pop(url, None)
+
+        future = self._art.get(url)
+        if future is None or future.cancelled():
+            future = self._art[url] = asyncio.get_running_loop().create_task(self._download(url))
+        return await asyncio.shield(future)
+
+    async def _download(self, url):
+        path = os.path.join(self.art_directory, card_key(url) + os.path.splitext(url.split("?")[0])[1][:5])
+        if await asyncio.to_thread(os.path.exists, path):
+            return path
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=ART_TIMEOUT)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    data = await response.read()
+
+            def store():
+                Image.open(io.BytesIO(data)).verify()  # kaputte Bilder nicht speichern
+                with open(path + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(path + ".tmp", path)
+
+            await asyncio.to_thread(store)
+            self.downloads += 1
+            self._art_failed.pop(url, None)
+            return path
+        except Exception as e:
+            # bis zum nächsten Versuch ohne Hintergrund rendern statt jedes Mal neu zu laden
+            _, delay = self._art_failed.get(url, (0, ART_RETRY / 2))
+            delay = min(delay * 2, ART_RETRY_MAX)
+            self._art_failed[url] = (time.monotonic() + delay, delay)
+            print(f"⚠️ Trackbild nicht geladen ({url}), neuer Versuch in {delay:.0f}s: {e}")
+            return None
@@ -0,0 +1,60 @@
+from ranking import Standings
+
+# ================= MEISTERSCHAFT =================
+#
+# Punkte pro Track-Position (z.B. F1: 25, 18, 15, ...) über eine Auswahl an
+# Tracks (None = alle), als Gesamtwertung pro Guild.
+#
+# Gepflegt wird inkrementell: pro Track merken wir, wer wie viele Punkte
+# bekommen hat (nur die Top len(points)). Ändert sich ein Board, wird nur
+# dieser Track neu bewertet und die Differenz auf die Standings gebucht -
+# und auch das nur, wenn sich Ränge innerhalb der Punkteränge verschoben haben.
+
+DEFAULT_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+DEFAULT_CHAMPIONSHIPS = {"overall": {"points": DEFAULT_POINTS, "tracks": None}}
+
+
+class Championship:
+    def __init__(self, name, points=None, tracks=None):
+        self.name = name
+        self.points = list(points or DEFAULT_POINTS)
+        self.tracks = set(tracks) if tracks else None
+        self.standings = Standings()
+        self.awarded = {}  # { track: { user_id: punkte } }
+
+    def counts(self, track):
+        return self.tracks is None or track in self.tracks
+
+    def update(self, track, board, first_rank=1):
+        """Track neu bewerten; first_rank = erster Rang, der sich bewegt hat."""
+        if not self.counts(track) or first_rank > len(self.points):
+            return
+
+        new = {
+            user_id: self.points[i]
+            for i, (user_id, _) in enumerate(board.range(0, len(self.points)))
+        }
+        old = self.awarded.get(track, {})
+
+        for user_id in old.keys() | new.keys():
+            self.standings.add(user_id, new.get(user_id, 0) - old.get(user_id, 0))
+        self.awarded[track] = new
+
+    def rebuild(self, leaderboards):
+        self.standings = Standings()
+        self.awarded = {}
+        for track, board in leaderboards.items():
+            self.update(track, board)
+
+    def to_json(self):
+        return {"points": self.points, "tracks": sorted(self.tracks) if self.tracks else None}
+
+
+def build_championships(config, leaderboards):
+    """{ name: Championship } aus den Guild-Settings, komplett berechnet."""
+    championships = {}
+    for name, entry in (config or DEFAULT_CHAMPIONSHIPS).items():
+        championship = Championship(name, entry.get("points"), entry.get("tracks"))
+        championship.rebuild(leaderboards)
+        championships[name] = championship
+    return championships
@@ -0,0 +1,216 @@
+import asyncio
+import contextvars
+import functools
+import time
+from collections import deque
+
+# ================= OUTBOUND DISPATCHER =================
+#
+# Alle Discord-Requests laufen durch eine Warteschlange mit Prioritäten:
+#   INTERACTION  Antworten auf Buttons/Slash (3s-Frist)
+#   REPLY        Antworten auf !-Commands
+#   BOARD        Leaderboard-/Race-Post-Edits, Board-Checks
+#   DELETE       Aufräumen (Scheduler, cleanup_events)
+#
+# Pro Route (+ Channel) wird ein eigener Bucket mitgezählt und zusätzlich
+# ein globales Limit. Gestartet wird immer der wichtigste Request, dessen
+# Bucket noch frei ist - ein großes Aufräumen kann also keine Antwort mehr
+# hinter sich einreihen. BOARD und DELETE dürfen außerdem nur begrenzt
+# gleichzeitig laufen, damit sie nie alle Slots in discord.py belegen.
+
+INTERACTION, REPLY, BOARD, DELETE = range(4)
+CLASS_NAMES = ("interaction", "reply", "board", "delete")
+
+# gleichzeitig laufende Requests pro Klasse (None = unbegrenzt)
+CLASS_LIMITS = (None, None, 2, 1)
+
+# { route: (requests, pro_sekunden) } - an Discords Standard-Buckets angelehnt
+ROUTE_LIMITS = {
+    "send": (5, 5.0),
+    "edit": (5, 5.0),
+    "delete": (5, 1.0),
+    "bulk_delete": (1, 1.0),
+    "fetch_message": (50, 1.0),
+    "fetch_user": (50, 1.0),
+    "interaction": (50, 1.0),
+}
+GLOBAL_LIMIT = (45, 1.0)  # Discord: 50/s pro Bot, etwas Luft lassen
+
+
+class Bucket:
+    __slots__ = ("limit", "per", "remaining", "reset_at")
+
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def ready(self, now):
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        return self.remaining > 0
+
+    def take(self):
+        self.remaining -= 1
+
+    def retry_after(self, now):
+        return max(0.0, self.reset_at - now)
+
+
+class Dispatcher:
+    def __init__(self, metrics=None, routes=ROUTE_LIMITS, class_limits=CLASS_LIMITS, global_limit=GLOBAL_LIMIT):
+        self.metrics = metrics
+        self.routes = routes
+        self.class_limits = class_limits
+        self.rate_limits = True  # False: nur Prioritäten/Klassen-Limits (Benchmarks)
+        self._queues = [deque() for _ in CLASS_NAMES]  # pro Klasse FIFO
+        self._active = [0] * len(CLASS_NAMES)
+        self._buckets = {}  # { (route, major): Bucket }
+        self._global = Bucket(*global_limit)
+        self._wake = None
+        self._task = None
+
+    @property
+    def queue_depth(self):
+        return sum(len(queue) for queue in self._queues)
+
+    def depth(self, priority):
+        return len(self._queues[priority])
+
+    # ===== API =====
+
+    async def call(self, priority, route, major, func, *args, **kwargs):
+        """Request einreihen und auf das Ergebnis warten (Fehler kommen durch)."""
+        future = asyncio.get_running_loop().create_future()
+        self._submit(priority, route, major, functools.partial(func, *args, **kwargs), future)
+        return await future
+
+    def fire(self, priority, route, major, func, *args, **kwargs):
+        """Fire-and-forget: der Handler wartet nicht, Fehler werden nur gezählt."""
+        self._submit(priority, route, major, functools.partial(func, *args, **kwargs), None)
+
+    def _submit(self, priority, route, major, call, future):
+        # Kontext des Aufrufers mitnehmen (contextvars), der Request läuft sonst im Pumpen-Task
+        context = contextvars.copy_context()
+        self._queues[priority].append((route, major, call, future, time.monotonic(), context))
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._pump())
+        self._wake.set()
+
+    # ===== PUMPE =====
+
+    def _bucket(self, route, major):
+        key = (route, major)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = Bucket(*self.routes.get(route, (50, 1.0)))
+        return bucket
+
+    def _start_ready(self):
+        """Startet alles, was gerade darf. Gibt die Wartezeit bis zum nächsten Versuch zurück."""
+        now = time.monotonic()
+        wait = None
+
+        for priority, queue in enumerate(self._queues):
+            limit = self.class_limits[priority]
+            blocked = set()  # Routen, die in diesem Durchlauf schon voll sind
+            kept = deque()
+
+            while queue:
+                job = queue.popleft()
+                route, major, call, future, queued_at, context = job
+
+                if future is not None and future.cancelled():
+                    continue
+
+                if (limit is not None and self._active[priority] >= limit) or (route, major) in blocked:
+                    kept.append(job)
+                    continue
+
+                if not self.rate_limits:
+                    self._start(priority, route, call, future, now - queued_at, context)
+                    continue
+
+                bucket = self._bucket(route, major)
+                if not self._global.ready(now):
+                    kept.append(job)
+                    kept.extend(queue)
+                    queue.clear()
+                    retry = self._global.retry_after(now)
+                    wait = retry if wait is None else min(wait, retry)
+                    break
+
+                if not bucket.ready(now):
+                    blocked.add((route, major))
+                    kept.append(job)
+                    retry = bucket.retry_after(now)
+                    wait = retry if wait is None else min(wait, retry)
+                    continue
+
+                bucket.take()
+                self._global.take()
+                self._start(priority, route, call, future, now - queued_at, context)
+
+            self._queues[priority] = kept
+
+        return wait
+
+    def _start(self, priority, route, call, future, waited, context):
+        self._active[priority] += 1
+        if self.metrics is not None:
+            self.metrics.observe("dispatch_wait_seconds", waited, priority=CLASS_NAMES[priority])
+        asyncio.get_running_loop().create_task(self._run(priority, route, call, future), context=context)
+
+    async def _run(self, priority, route, call, future):
+        try:
+            result = await call()
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.inc("dispatch_errors_total", route=route)
+            if future is not None and not future.cancelled():
+                future.set_exception(e)
+        else:
+            if future is not None and not future.cancelled():
+                future.set_result(result)
+        finally:
+            # Task abgebrochen (z.B. Shutdown) -> Aufrufer nicht ewig warten lassen
+            if future is not None and not future.done():
+                future.cancel()
+            self._active[priority] -= 1
+            self._wake.set()
+
+    async def _pump(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wake.clear()
+            wait = self._start_ready()
+
+            # schlafen bis ein Bucket wieder frei ist oder sich etwas ändert
+            timer = loop.call_later(wait, self._wake.set) if wait is not None else None
+            try:
+                await self._wake.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+    async def drain(self):
+        """Warten, bis die Warteschlange leer ist und nichts mehr läuft (Shutdown)."""
+        while self.queue_depth or any(self._active):
+            await asyncio.sleep(0.05)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        # nie gestartete Requests: wartende Aufrufer freigeben
+        for queue in self._queues:
+            for job in queue:
+                future = job[3]
+                if future is not None and not future.done():
+                    future.cancel()
+            queue.clear()
@@ -0,0 +1,121 @@
+import contextvars
+import copy
+import json
+import os
+import time
+
+from storage import JournalStore, apply_record, empty_state, repair_tail
+
+# ================= EVENT LOG =================
+#
+# data/<guild_id>/events.log - wie das Journal eine JSON-Zeile pro Änderung,
+# aber wird NIE kompaktiert. Damit lässt sich jeder Stand nachträglich
+# rekonstruieren (Streitfälle, Bugs aus Produktion nachstellen):
+#
+#   { op, seq, at, cmd?, by?, ...felder }
+#
+#   seq   fortlaufend pro Guild (Reihenfolge), at = Unix-Zeit
+#   cmd   auslösender Command / Button, by = User-ID (aus event_context)
+#
+# Zustandsänderungen sind genau die Journal-Ops (storage.apply_record).
+# Dazu kommen Einträge ohne Zustand:
+#
+#   baseline       Stand beim Anlegen des Logs (Daten von vor dem Log)
+#   lap_rejected   ungültige Eingabe (Format, Track, Zeit)
+#   command/slash/button   Trace: Argumente + Laufzeit -> replay.py --trace
+#
+# replay.py baut daraus offline den Stand (auch zu einem Zeitpunkt) neu auf.
+
+# { cmd, by } des gerade laufenden Commands (before_invoke / interaction_check)
+event_context = contextvars.ContextVar("event_context", default=None)
+
+TRACE_OPS = ("command", "slash", "button")
+TAIL_CHUNK = 64 * 1024  # erstes Lesefenster für die letzte seq
+
+
+class EventLog:
+    def __init__(self, path, writer=None):
+        self.path = path
+        # nur zum Schreiben (Writer-Thread, fsync), kein Snapshot
+        self.store = JournalStore(None, path, compact_every=float("inf"), writer=writer)
+        self.seq = 0
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Letzte seq aus dem Dateiende lesen (ganze Datei wäre bei großem Log zu langsam).
+        Das Fenster wächst, bis eine ganze Zeile drin ist (z.B. große baseline)."""
+        self.seq = 0
+        repair_tail(self.path)
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            size = f.seek(0, os.SEEK_END)
+            chunk = TAIL_CHUNK
+            while True:
+                start = max(0, size - chunk)
+                f.seek(start)
+                lines = f.read(size - start).splitlines()
+                if start > 0:
+                    lines = lines[1:]  # erste Zeile ist evtl. nur angeschnitten
+
+                for line in reversed(lines):
+                    try:
+                        self.seq = json.loads(line)["seq"]
+                        return
+                    except (ValueError, KeyError):
+                        continue
+
+                if start == 0:
+                    return
+                chunk *= 4
+
+    def append(self, op, **fields):
+        self.seq += 1
+        context = event_context.get()
+        if context:
+            fields = {**context, **fields}
+        self.store.append(op, seq=self.seq, at=round(time.time(), 3), **fields)
+
+    def close(self):
+        self.store.close()
+
+
+# ===== LESEN / REPLAY =====
+
+def read_events(path, until_ts=None, until_seq=None):
+    """Events in Reihenfolge; stoppt beim ersten Event nach until_ts / until_seq."""
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if until_ts is not None and event["at"] > until_ts:
+                return
+            if until_seq is not None and event["seq"] > until_seq:
+                return
+            yield event
+
+
+def apply_event(state, event):
+    if event["op"] == "baseline":
+        state.clear()
+        state.update(copy.deepcopy({**empty_state(), **event["state"]}))
+    else:
+        apply_record(state, event)  # unbekannte Ops (Trace, Rejects) ändern nichts
+
+
+def rebuild(events):
+    state = empty_state()
+    for event in events:
+        apply_event(state, event)
+    return state
@@ -0,0 +1,287 @@
+import asyncio
+import contextvars
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+
+# ================= FAKE DISCORD =================
+#
+# Lokaler Ersatz für Gateway/HTTP, damit die Command-Handler aus bot.py
+# offline unter Last laufen können (bench.py). Jeder "API-Call" kostet
+# simulierte Latenz und läuft durch Rate-Limit-Buckets pro Route + Channel,
+# die bei Überlauf einen 429 zählen und wie discord.py retry_after abwarten.
+
+# aktueller Command, damit API-Calls ihm zugerechnet werden können
+current_command = contextvars.ContextVar("current_command", default="background")
+
+# { route: (requests, per_seconds) } - grob an Discord angelehnt
+ROUTE_LIMITS = {
+    "send": (5, 5.0),
+    "edit": (5, 5.0),
+    "delete": (5, 1.0),
+    "bulk_delete": (1, 1.0),
+    "history": (5, 1.0),
+    "fetch_message": (50, 1.0),
+    "fetch_user": (50, 1.0),
+    "interaction": (50, 1.0),
+}
+
+_last_snowflake = 0
+
+
+def next_snowflake():
+    # wie bei Discord: Zeitstempel steckt in der ID (wichtig für Bulk-Delete < 14 Tage)
+    global _last_snowflake
+    _last_snowflake = max(_last_snowflake + 1, discord.utils.time_snowflake(datetime.now(timezone.utc)))
+    return _last_snowflake
+
+
+class RouteBucket:
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self):
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def retry_after(self):
+        return max(0.0, self.reset_at - time.monotonic())
+
+
+class FakeAPI:
+    def __init__(self, latency=0.05, jitter=0.02, rate_limits=True, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limits = rate_limits
+        self.random = random.Random(seed)
+        self.calls = Counter()        # { command: api_calls }
+        self.routes = Counter()       # { route: api_calls }
+        self.ratelimited = Counter()  # { command: 429s }
+        self.buckets = {}
+        self.channels = {}
+        self.users = {}
+        self.bot_user = FakeUser(next_snowflake(), "PitBoss", bot=True)
+
+    async def request(self, route, major=None):
+        command = current_command.get()
+        self.calls[command] += 1
+        self.routes[route] += 1
+
+        if self.rate_limits:
+            key = (route, major)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = RouteBucket(*ROUTE_LIMITS.get(route, (50, 1.0)))
+            while not bucket.take():
+                self.ratelimited[command] += 1
+                await asyncio.sleep(bucket.retry_after())
+
+        await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+
+    # ===== BOT-SEITE =====
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id):
+        return None  # User-Cache leer -> fetch_user wird gebraucht
+
+    async def fetch_user(self, user_id):
+        await self.request("fetch_user")
+        user = self.users.get(int(user_id))
+        if user is None:
+            raise not_found()
+        return user
+
+    def install(self, bot):
+        """Ersetzt die HTTP-gestützten Methoden des echten Bot-Objekts."""
+        bot.get_channel = self.get_channel
+        bot.get_partial_messageable = self.get_channel
+        bot.get_user = self.get_user
+        bot.fetch_user = self.fetch_user
+        bot._connection.user = self.bot_user
+
+
+def not_found():
+    return discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+
+
+class FakeUser:
+    def __init__(self, user_id, name, bot=False):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.roles = []
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id=None):
+        self.id = guild_id or next_snowflake()
+        self.members = {}
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+
+class FakeMessage:
+    def __init__(self, api, channel, author, content=None, embeds=None, view=None):
+        self.api = api
+        self.id = next_snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = embeds or []
+        self.view = view
+        self.created_at = datetime.now(timezone.utc)
+
+    async def edit(self, *, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await self.api.request("edit", self.channel.id)
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        if embeds is not None:
+            self.embeds = list(embeds)
+        if view is not None:
+            self.view = view
+        return self
+
+    async def delete(self, *, delay=None):
+        if delay:
+            await asyncio.sleep(delay)
+        await self.api.request("delete", self.channel.id)
+        if self.channel.messages.pop(self.id, None) is None:
+            raise not_found()
+
+
+class FakeChannel:
+    def __init__(self, api, guild, channel_id=None):
+        self.api = api
+        self.id = channel_id or next_snowflake()
+        self.guild = guild
+        self.messages = {}  # { message_id: FakeMessage } (älteste zuerst)
+        api.channels[self.id] = self
+
+    def post(self, author, content=None, embeds=None, view=None):
+        """Nachricht ohne API-Call anlegen (z.B. User-Commands)."""
+        msg = FakeMessage(self.api, self, author, content, embeds, view)
+        self.messages[msg.id] = msg
+        return msg
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, delete_after=None, **kwargs):
+        await self.api.request("send", self.id)
+        embeds = [embed] if embed is not None else list(embeds or [])
+        msg = self.post(self.api.bot_user, content, embeds, view)
+        if delete_after is not None:
+            asyncio.create_task(msg.delete(delay=delete_after))
+        return msg
+
+    async def fetch_message(self, message_id):
+        await self.api.request("fetch_message", self.id)
+        msg = self.messages.get(message_id)
+        if msg is None:
+            raise not_found()
+        return msg
+
+    def get_partial_message(self, message_id):
+        return self.messages.get(message_id) or FakeMessage(self.api, self, None)
+
+    async def delete_messages(self, messages):
+        await self.api.request("bulk_delete", self.id)
+        for msg in messages:
+            self.messages.pop(msg.id, None)
+
+    async def history(self, limit=100):
+        newest_first = list(reversed(self.messages.values()))
+        if limit is not None:
+            newest_first = newest_first[:limit]
+        for i, msg in enumerate(newest_first):
+            if i % 100 == 0:
+                await self.api.request("history", self.id)
+            yield msg
+
+
+class FakeContext:
+    def __init__(self, api, channel, author, text, command):
+        self.bot = None
+        self.author = author
+        self.guild = channel.guild
+        self.channel = channel
+        self.message = channel.post(author, text)
+        self.command = SimpleNamespace(name=command)
+
+    async def send(self, *args, **kwargs):
+        return await self.channel.send(*args, **kwargs)
+
+
+class FakeResponse:
+    def __init__(self, api, interaction):
+        self.api = api
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self):
+        if self._done:
+            raise discord.InteractionResponded(self.interaction)
+        self._done = True
+        await self.api.request("interaction")
+
+    async def edit_message(self, *, embed=None, view=None, **kwargs):
+        await self._respond()
+        if embed is not None:
+            self.interaction.message.embeds = [embed]
+
+    async def send_message(self, content=None, *, ephemeral=False, **kwargs):
+        await self._respond()
+
+    async def defer(self, *, ephemeral=False, thinking=False):
+        await self._respond()
+
+
+class FakeFollowup:
+    def __init__(self, api):
+        self.api = api
+
+    async def send(self, content=None, *, ephemeral=False, **kwargs):
+        await self.api.request("interaction")
+
+
+class FakeInteraction:
+    def __init__(self, api, message, user):
+        self.user = user
+        self.message = message
+        self.guild = message.guild
+        self.guild_id = message.guild.id
+        self.channel = message.channel
+        self.channel_id = message.channel.id
+        self.extras = {}
+        self.api = api
+        self.response = FakeResponse(api, self)
+        self.followup = FakeFollowup(api)
+
+    async def edit_original_response(self, *, embed=None, view=None, **kwargs):
+        await self.api.request("interaction")
+        if embed is not None:
+            self.message.embeds = [embed]
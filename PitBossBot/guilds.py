@@ -0,0 +1,200 @@
+import asyncio
+import os
+from contextlib import nullcontext
+
+from storage import JournalStore
+from events import EventLog
+from ranking import Leaderboard
+from laps import LapHistory
+from championship import build_championships
+
+# ================= GUILD DATEN =================
+#
+# Jede Guild hat ihren eigenen Ordner (data/<guild_id>/) mit Snapshot +
+# Journal. Geladen wird erst, wenn die Guild das erste Mal etwas braucht -
+# Speicher und Startzeit hängen also an aktiven Guilds, nicht an allen.
+# Jede Journal-Änderung landet zusätzlich im Event-Log (events.py).
+#
+# Fencing: `fence()` (vom Bot: sind wir noch Leader dieser Lease-Epoche?)
+# wird vor jedem Schreiben geprüft. Nach Lease-Verlust oder detach() laufen
+# Handler evtl. noch mit alten GuildData-Referenzen weiter - deren
+# Schreibzugriffe werden verworfen, sonst schrieben zwei Instanzen parallel.
+
+DEFAULT_SETTINGS = {
+    "lb_channel_id": None
+}
+
+
+class GuildData:
+    def __init__(self, guild_id, path, metrics=None, writer=None, fence=None):
+        self.guild_id = guild_id
+        self.path = path
+        self.metrics = metrics
+        self.fence = fence
+        self.closed = False
+        self.store = JournalStore(
+            os.path.join(path, "data.json"),
+            os.path.join(path, "data.journal"),
+            writer=writer
+        )
+        self.events = EventLog(os.path.join(path, "events.log"), writer=writer)
+
+        self.leaderboards = {}          # { "monza": Leaderboard({ user_id: time_in_seconds }) }
+        self.histories = {}             # { "monza": LapHistory } - alle Runden
+        self.leaderboard_messages = {}  # { "monza": { channel_id, message_id } }
+        self.race_events = {}           # { message_id: { track, timestamp, ..., rsvp: { user_id: status } } }
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.championships = {}         # { "overall": Championship } - aus settings + leaderboards
+
+        self.linked = False  # Board-Links seit Prozessstart geprüft?
+        self.link_lock = asyncio.Lock()  # Board-Links prüfen/ändern nur nacheinander
+
+    def _timer(self, op):
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.timer("storage_seconds", op=op)
+
+    def load(self):
+        os.makedirs(self.path, exist_ok=True)
+
+        try:
+            with self._timer("load_data"):
+                state = self.store.load()
+
+            self.leaderboards = {
+                track: Leaderboard(times) for track, times in state["laps"].items()
+            }
+            self.histories = {
+                track: LapHistory.from_json(columns) for track, columns in state["history"].items()
+            }
+            for track, user_id, ms, ts in state["history_log"]:
+                self.history(track).add(user_id, ms, ts)
+            self.leaderboard_messages = state["messages"]
+            self.race_events = state["events"]
+            self.settings = {**DEFAULT_SETTINGS, **state["settings"]}
+            self.rebuild_championships()
+
+            # Daten von vor dem Event-Log einmal als Ausgangsstand festhalten
+            new_log = not self.events.exists
+            self.events.load()
+            if new_log and any(state[key] for key in ("laps", "history", "history_log", "messages", "events", "settings")):
+                self.log("baseline", state=self.snapshot())
+
+        except Exception as e:
+            print(f"❌ Daten für Guild {self.guild_id} konnten nicht geladen werden: {e}")
+
+    def snapshot(self):
+        # Kopie, weil der Writer-Thread erst später serialisiert
+        return {
+            "laps": {track: board.to_dict() for track, board in self.leaderboards.items()},
+            "history": {track: history.to_json() for track, history in self.histories.items()},
+            "history_log": [],
+            "messages": {track: dict(link) for track, link in self.leaderboard_messages.items()},
+            "events": {
+                message_id: {**event, "rsvp": dict(event["rsvp"])}
+                for message_id, event in self.race_events.items()
+            },
+            "settings": dict(self.settings)
+        }
+
+    def writable(self):
+        if self.closed or (self.fence is not None and not self.fence()):
+            if self.metrics is not None:
+                self.metrics.inc("fenced_writes_total")
+            return False
+        return True
+
+    def save(self):
+        # Vollständiger Snapshot + Journal leeren (Kompaktierung)
+        if not self.writable():
+            return
+        with self._timer("save_data"):
+            self.store.compact(self.snapshot())
+
+    def journal(self, op, **fields):
+        # Eine Änderung anhängen statt alles neu zu schreiben
+        if not self.writable():
+            print(f"⚠️ Guild {self.guild_id}: nicht mehr Leader, '{op}' verworfen")
+            return
+        with self._timer("journal"):
+            compact_due = self.store.append(op, **fields)
+            self.events.append(op, **fields)
+        if compact_due:
+            self.save()
+
+    def log(self, op, **fields):
+        # nur ins Event-Log (kein Zustand): Rejects, Command-Trace
+        if self.writable():
+            self.events.append(op, **fields)
+
+    def close(self):
+        self.closed = True
+        self.store.close()
+        self.events.close()
+
+    def history(self, track):
+        if track not in self.histories:
+            self.histories[track] = LapHistory()
+        return self.histories[track]
+
+    def rebuild_championships(self):
+        self.championships = build_championships(self.settings.get("championships"), self.leaderboards)
+
+    def board_changed(self, track):
+        # nach submit/remove: nur diesen Track in den Meisterschaften nachziehen
+        board = self.leaderboards[track]
+        for championship in self.championships.values():
+            championship.update(track, board, board.last_change[0])
+
+    def board(self, track):
+        if track not in self.leaderboards:
+            self.leaderboards[track] = Leaderboard()
+        return self.leaderboards[track]
+
+
+class GuildRegistry:
+    def __init__(self, root="data", metrics=None, writer=None, fence=None):
+        self.root = root
+        self.metrics = metrics
+        self.writer = writer
+        self.fence = fence
+        self._guilds = {}  # { guild_id: GuildData }
+
+    def __contains__(self, guild_id):
+        return guild_id in self._guilds
+
+    def get(self, guild_id):
+        data = self._guilds.get(guild_id)
+        if data is None:
+            data = GuildData(guild_id, os.path.join(self.root, str(guild_id)), self.metrics, self.writer, self.fence)
+            data.load()
+            self._guilds[guild_id] = data
+        return data
+
+    def loaded(self):
+        return list(self._guilds.values())
+
+    def forget(self, guild_id):
+        # eine Guild schließen und beim nächsten Zugriff neu von der Platte laden
+        data = self._guilds.pop(guild_id, None)
+        if data is not None:
+            data.close()
+            if self.writer is not None:
+                self.writer.flush()
+
+    def detach(self):
+        # Leader-Rolle verloren: alles vergessen (auf dem Event-Loop, Handler
+        # greifen parallel zu). Beim nächsten Zugriff wird frisch geladen.
+        # close() der zurückgegebenen Guilds schreibt Offenes (im Thread).
+        detached = list(self._guilds.values())
+        self._guilds.clear()
+        for data in detached:
+            data.closed = True  # ab sofort keine Schreibzugriffe mehr
+        return detached
+
+    def close(self):
+        # beim Shutdown: alles noch Offene auf die Platte
+        for data in self._guilds.values():
+            data.close()
+        if self.writer is not None:
+            self.writer.close()
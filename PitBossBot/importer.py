@@ -0,0 +1,184 @@
+import codecs
+import csv
+import io
+import json
+import re
+from datetime import datetime, timezone
+
+# ================= LAP IMPORT =================
+#
+# Liest ACC-Server-Resultate (JSON) und CSV-Dateien in eine Liste von
+# Runden [track, user_id, ms, ts]. Es wird hier nur geparst und geprüft -
+# angewendet wird alles zusammen in bot.py (import_laps), damit ein Import
+# ganz oder gar nicht übernommen wird.
+#
+# CSV:  track,driver,time[,date]   driver = Discord-ID oder <@id>
+#       date = Unix-Zeit oder ISO (2024-05-01 20:15), optional
+
+MAX_ERRORS = 20
+
+
+class ImportResult:
+    def __init__(self):
+        self.laps = []     # [track, user_id, ms, ts]
+        self.errors = []   # "datei:zeile: grund" (max. MAX_ERRORS)
+        self.error_count = 0
+        self.skipped = 0   # z.B. ungültige Runden, unbekannte Steam-IDs
+        self.unknown_drivers = set()
+
+    def error(self, where, reason):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"{where}: {reason}")
+
+
+def decode(raw):
+    # ACC schreibt seine Resultate als UTF-16 LE
+    if raw.startswith(codecs.BOM_UTF16_LE) or raw.startswith(codecs.BOM_UTF16_BE):
+        return raw.decode("utf-16")
+    if len(raw) > 1 and raw[1] == 0:
+        return raw.decode("utf-16-le")
+    return raw.decode("utf-8-sig")
+
+
+def _time_from_filename(filename):
+    # ACC: 241015_203012_R.json -> 15.10.2024 20:30:12
+    match = re.match(r"(\d{6})_(\d{6})", filename)
+    if not match:
+        return None
+    try:
+        dt = datetime.strptime("".join(match.groups()), "%y%m%d%H%M%S")
+    except ValueError:
+        return None
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _ms_to_str(ms):
+    return f"{ms // 60000}:{ms % 60000 / 1000:06.3f}"
+
+
+def parse_acc(raw, filename, steam_ids, resolve_track, time_to_seconds, result, now):
+    try:
+        data = json.loads(decode(raw))
+    except (ValueError, UnicodeDecodeError) as e:
+        result.error(filename, f"kein gültiges JSON ({e})")
+        return
+
+    track_name = str(data.get("trackName", "")).replace("_", " ")
+    track = resolve_track(track_name)
+    if track is None:
+        result.error(filename, f"Track '{track_name}' nicht erkannt")
+        return
+
+    ts = _time_from_filename(filename) or now
+
+    # carId -> Fahrerliste, damit driverIndex aufgelöst werden kann
+    cars = {}
+    for line in data.get("sessionResult", {}).get("leaderBoardLines", []):
+        car = line.get("car", {})
+        cars[car.get("carId")] = car.get("drivers", [])
+
+    for i, lap in enumerate(data.get("laps", [])):
+        if not lap.get("isValidForBest", True):
+            result.skipped += 1
+            continue
+
+        drivers = cars.get(lap.get("carId"), [])
+        index = lap.get("driverIndex", 0)
+        if index >= len(drivers):
+            result.error(f"{filename}:lap {i}", "Fahrer nicht im Ergebnis")
+            continue
+
+        steam_id = str(drivers[index].get("playerId", "")).lstrip("S")
+        user_id = steam_ids.get(steam_id)
+        if user_id is None:
+            result.unknown_drivers.add(steam_id)
+            result.skipped += 1
+            continue
+
+        # gleiche Regeln wie !hotlap
+        ms = lap.get("laptime")
+        seconds = time_to_seconds(_ms_to_str(ms)) if isinstance(ms, int) and ms > 0 else None
+        if seconds is None:
+            result.error(f"{filename}:lap {i}", f"ungültige Zeit {ms}")
+            continue
+
+        result.laps.append([track, str(user_id), ms, ts])
+
+
+def _parse_date(value, now):
+    value = value.strip()
+    if not value:
+        return now
+    if value.isdigit():
+        return int(value)
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def parse_csv(raw, filename, resolve_track, time_to_seconds, result, now):
+    try:
+        text = io.StringIO(decode(raw))
+    except UnicodeDecodeError as e:
+        result.error(filename, f"Encoding nicht lesbar ({e})")
+        return
+
+    sample = text.read(2048)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    # zeilenweise, die Datei wird nie komplett in Dicts umgewandelt
+    for line_no, row in enumerate(csv.reader(text, dialect), 1):
+        if not row or not "".join(row).strip():
+            continue
+        if line_no == 1 and row[0].strip().lower() == "track":
+            continue  # Header
+
+        where = f"{filename}:{line_no}"
+        if len(row) < 3:
+            result.error(where, "erwartet track,driver,time[,date]")
+            continue
+
+        track = resolve_track(row[0])
+        if track is None:
+            result.error(where, f"Track '{row[0].strip()}' nicht erkannt")
+            continue
+
+        user_id = re.sub(r"[<@!>]", "", row[1].strip())
+        if not user_id.isdigit():
+            result.error(where, f"Fahrer '{row[1].strip()}' ist keine Discord-ID")
+            continue
+
+        seconds = time_to_seconds(row[2].strip())
+        if seconds is None:
+            result.error(where, f"ungültige Zeit '{row[2].strip()}'")
+            continue
+
+        try:
+            ts = _parse_date(row[3] if len(row) > 3 else "", now)
+        except ValueError:
+            result.error(where, f"ungültiges Datum '{row[3].strip()}'")
+            continue
+
+        result.laps.append([track, user_id, round(seconds * 1000), ts])
+
+
+def parse_files(files, steam_ids, resolve_track, time_to_seconds):
+    """files = [(dateiname, bytes)] -> ImportResult. Läuft im Thread."""
+    result = ImportResult()
+    now = int(datetime.now(timezone.utc).timestamp())
+
+    for filename, raw in files:
+        if filename.lower().endswith(".json"):
+            parse_acc(raw, filename, steam_ids, resolve_track, time_to_seconds, result, now)
+        elif filename.lower().endswith((".csv", ".txt")):
+            parse_csv(raw, filename, resolve_track, time_to_seconds, result, now)
+        else:
+            result.error(filename, "nur .json (ACC) oder .csv")
+
+    return result
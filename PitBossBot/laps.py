@@ -0,0 +1,164 @@
+import base64
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+
+# ================= LAP HISTORY =================
+#
+# Jede eingereichte Runde eines Tracks, spaltenweise in array()s:
+#   ms     - Rundenzeit in ganzen Millisekunden (int32)
+#   users  - Discord User-ID (int64)
+#   ts     - Unix-Zeitstempel in Sekunden (int64)
+# ~20 Byte pro Runde statt ein Dict pro Eintrag. Aggregate pro Fahrer und
+# die Verteilung aller Zeiten werden beim Anhängen mitgeführt, Abfragen
+# müssen also nie über alle Runden laufen.
+
+BUCKET_MS = 10  # Auflösung für Perzentile der Track-Verteilung
+
+
+class DriverStats:
+    __slots__ = ("count", "total", "total_sq", "best", "first", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.best = None
+        self.first = None
+        self.rows = array("I")  # Zeilen dieses Fahrers, chronologisch
+
+    def add(self, row, ms):
+        self.count += 1
+        self.total += ms
+        self.total_sq += ms * ms
+        if self.best is None or ms < self.best:
+            self.best = ms
+        if self.first is None:
+            self.first = ms
+        self.rows.append(row)
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+    @property
+    def stdev(self):
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class LapHistory:
+    def __init__(self):
+        self.ms = array("i")
+        self.users = array("q")
+        self.ts = array("q")
+        self.drivers = {}    # { user_id (int): DriverStats }
+        self.buckets = {}    # { ms // BUCKET_MS: anzahl }
+
+    def __len__(self):
+        return len(self.ms)
+
+    def add(self, user_id, ms, ts):
+        user_id = int(user_id)
+        row = len(self.ms)
+        self.ms.append(ms)
+        self.users.append(user_id)
+        self.ts.append(ts)
+
+        stats = self.drivers.get(user_id)
+        if stats is None:
+            stats = self.drivers[user_id] = DriverStats()
+        stats.add(row, ms)
+
+        bucket = ms // BUCKET_MS
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    # ===== ABFRAGEN =====
+
+    def driver(self, user_id):
+        return self.drivers.get(int(user_id))
+
+    def progression(self, user_id, limit=10):
+        """Letzte `limit` Runden als (ts, ms, bestzeit_bis_dahin)."""
+        stats = self.driver(user_id)
+        if stats is None:
+            return []
+
+        rows = stats.rows[-limit:]
+        # Bestzeit vor dem Ausschnitt nur nachrechnen, wenn nötig
+        best = None
+        for row in stats.rows[:len(stats.rows) - len(rows)]:
+            if best is None or self.ms[row] < best:
+                best = self.ms[row]
+
+        result = []
+        for row in rows:
+            ms = self.ms[row]
+            best = ms if best is None else min(best, ms)
+            result.append((self.ts[row], ms, best))
+        return result
+
+    def percentiles(self, ps=(10, 25, 50, 75, 90)):
+        """Perzentile aller Runden (auf BUCKET_MS genau) als { p: ms }."""
+        total = len(self.ms)
+        if total == 0:
+            return {}
+
+        result = {}
+        targets = sorted(ps)
+        seen = 0
+        i = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            while i < len(targets) and seen >= targets[i] / 100 * total:
+                result[targets[i]] = bucket * BUCKET_MS
+                i += 1
+        return result
+
+    def improvers(self, limit=5, since=None):
+        """Größte Verbesserung (erste Runde -> Bestzeit) als (user_id, ms)."""
+        if since is None:
+            candidates = (
+                (stats.first - stats.best, user_id)
+                for user_id, stats in self.drivers.items()
+                if stats.count > 1
+            )
+        else:
+            candidates = self._improvement_since(since)
+
+        return [(user_id, gain) for gain, user_id in heapq.nlargest(limit, candidates) if gain > 0]
+
+    def _improvement_since(self, since):
+        # Zeilen sind chronologisch -> ab dem Stichtag per Bisect
+        for user_id, stats in self.drivers.items():
+            start = bisect_left(stats.rows, since, key=lambda row: self.ts[row])
+            recent = stats.rows[start:]
+            if len(recent) < 2:
+                continue
+            first = self.ms[recent[0]]
+            best = min(self.ms[row] for row in recent)
+            yield first - best, user_id
+
+    # ===== SPEICHERN =====
+
+    def to_json(self):
+        def pack(column):
+            return base64.b64encode(column.tobytes()).decode("ascii")
+
+        return {"ms": pack(self.ms), "users": pack(self.users), "ts": pack(self.ts)}
+
+    @classmethod
+    def from_json(cls, data):
+        history = cls()
+        columns = {}
+        for name, typecode in (("ms", "i"), ("users", "q"), ("ts", "q")):
+            column = array(typecode)
+            column.frombytes(base64.b64decode(data[name]))
+            columns[name] = column
+
+        for ms, user_id, ts in zip(columns["ms"], columns["users"], columns["ts"]):
+            history.add(user_id, ms, ts)
+        return history
@@ -0,0 +1,103 @@
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: kein flock, Lease gilt dann nur "best effort"
+    fcntl = None
+
+# ================= LEADER LEASE =================
+#
+# Mehrere Instanzen (z.B. beim Deploy) teilen sich den data-Ordner. Nur wer
+# die Lease hält, bearbeitet Commands und schreibt Daten; alle anderen
+# bleiben verbunden (warm) und versuchen regelmäßig zu übernehmen.
+#
+#   data/leader.lease       { owner, host, pid, expires, epoch }
+#   data/leader.lease.lock  flock für Lesen-Prüfen-Schreiben
+#
+# Der Leader verlängert alle ttl/3 Sekunden. Stirbt er, übernimmt ein
+# Standby spätestens nach ttl + ttl/3. Beim sauberen Beenden gibt der
+# Leader die Lease frei -> Übernahme innerhalb eines Intervalls.
+# `epoch` zählt jede Übernahme hoch (zum Erkennen von Leader-Wechseln).
+
+
+class Lease:
+    def __init__(self, path, owner, ttl=10.0):
+        self.path = path
+        self.owner = owner
+        self.ttl = ttl
+        self.expires = 0.0
+        self.epoch = 0
+
+    @property
+    def held(self):
+        # lokal prüfen: eine nicht rechtzeitig verlängerte Lease gilt als weg
+        return time.time() < self.expires
+
+    @contextmanager
+    def _mutex(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, lease):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(lease, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def holder(self):
+        """Aktueller Eintrag in der Lease-Datei (oder None)."""
+        return self._read()
+
+    def try_acquire(self):
+        """Lease übernehmen oder verlängern. True = wir sind Leader."""
+        with self._mutex():
+            now = time.time()
+            current = self._read()
+
+            if current is not None and current.get("owner") != self.owner and current.get("expires", 0) > now:
+                self.expires = 0.0
+                return False
+
+            epoch = current.get("epoch", 0) if current else 0
+            if current is None or current.get("owner") != self.owner:
+                epoch += 1
+
+            expires = now + self.ttl
+            self._write({
+                "owner": self.owner,
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "expires": expires,
+                "epoch": epoch
+            })
+            self.expires = expires
+            self.epoch = epoch
+            return True
+
+    def release(self):
+        """Beim Beenden: Lease sofort freigeben (nur wenn sie noch uns gehört)."""
+        with self._mutex():
+            current = self._read()
+            if current is not None and current.get("owner") == self.owner:
+                self._write({**current, "expires": 0})
+        self.expires = 0.0
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+
+# ================= METRICS =================
+#
+# Kleine Prometheus-kompatible Registry ohne Abhängigkeiten:
+# Counter + Histogramme mit festen Buckets, Labels als Keyword-Argumente.
+# Alle Zeilen bekommen zusätzlich den Instanz-Fingerprint (boot/host/pid).
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # letzter = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Obergrenze des Buckets, in dem das q-Quantil liegt."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self, **const_labels):
+        self.const_labels = const_labels
+        self.counters = {}    # { name: { label_key: value } }
+        self.histograms = {}  # { name: { label_key: Histogram } }
+        self.started = time.monotonic()
+
+    def inc(self, name, value=1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        if key not in series:
+            series[key] = Histogram()
+        series[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name, **labels):
+        return self.counters.get(name, {}).get(_label_key(labels), 0)
+
+    def histogram(self, name, **labels):
+        return self.histograms.get(name, {}).get(_label_key(labels))
+
+    def render(self):
+        """Prometheus Text-Format."""
+
+        def fmt(labels, extra=()):
+            pairs = list(self.const_labels.items()) + list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# TYPE pitboss_{name} counter")
+            for key, value in series.items():
+                lines.append(f"pitboss_{name}{fmt(key)} {value}")
+
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE pitboss_{name} histogram")
+            for key, hist in series.items():
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), hist.counts):
+                    cumulative += n
+                    lines.append(f"pitboss_{name}_bucket{fmt(key, [('le', bound)])} {cumulative}")
+                lines.append(f"pitboss_{name}_sum{fmt(key)} {hist.sum}")
+                lines.append(f"pitboss_{name}_count{fmt(key)} {hist.count}")
+
+        lines.append(f"pitboss_uptime_seconds{fmt(())} {time.monotonic() - self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host="127.0.0.1", port=9108):
+        """Minimaler HTTP-Endpoint für Prometheus (GET /metrics)."""
+
+        async def handle(reader, writer):
+            try:
+                request = await reader.readline()
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+
+                if request.split(b" ")[1:2] == [b"/metrics"]:
+                    body = self.render().encode()
+                    status = "200 OK"
+                else:
+                    body = b"not found\n"
+                    status = "404 Not Found"
+
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: text/plain; version=0.0.4\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+
+class RateLimitCounter(logging.Handler):
+    """Zählt 429-Warnungen, die discord.py selbst loggt und intern wiederholt."""
+
+    def __init__(self, metrics):
+        super().__init__(logging.WARNING)
+        self.metrics = metrics
+
+    def emit(self, record):
+        if "rate limited" in record.getMessage():
+            self.metrics.inc("rate_limited_total", logger=record.name)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from dispatcher import REPLY
+
+# ================= FAHRERNAMEN =================
+#
+# Reihenfolge beim Auflösen einer User-ID:
+#   1. Member-Cache der Guild (kein API-Call)
+#   2. User-Cache des Bots
+#   3. eigener LRU-Cache mit TTL
+#   4. bot.fetch_user - alle Misses gleichzeitig, begrenzt durch Semaphore,
+#      über den Dispatcher (REPLY, Route fetch_user) wie alle anderen Requests
+
+
+class NameCache:
+    def __init__(self, bot, dispatcher=None, maxsize=2000, ttl=600, concurrency=10, metrics=None):
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.metrics = metrics
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # { user_id: (name, expires_at) }
+        self._fetch_limit = asyncio.Semaphore(concurrency)
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+
+        name, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+
+        self._entries.move_to_end(user_id)
+        return name
+
+    def put(self, user_id, name):
+        self._entries[user_id] = (name, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        self._entries.pop(str(user_id), None)
+
+    async def _fetch(self, user_id):
+        async with self._fetch_limit:
+            start = time.perf_counter()
+            try:
+                if self.dispatcher is not None:
+                    user = await self.dispatcher.call(REPLY, "fetch_user", None, self.bot.fetch_user, int(user_id))
+                else:
+                    user = await self.bot.fetch_user(int(user_id))
+            except Exception:
+                return user_id, None
+            finally:
+                if self.metrics is not None:
+                    self.metrics.observe("discord_api_seconds", time.perf_counter() - start, call="fetch_user")
+        self.put(user_id, user.name)
+        return user_id, user.name
+
+    async def resolve(self, guild, user_ids):
+        """{ user_id: name } für alle auflösbaren IDs."""
+        names = {}
+        missing = []
+
+        for user_id in user_ids:
+            user_id = str(user_id)
+
+            member = guild.get_member(int(user_id)) if guild else None
+            if member is None:
+                member = self.bot.get_user(int(user_id))
+            if member is not None:
+                names[user_id] = member.name
+                continue
+
+            name = self.get(user_id)
+            if name is not None:
+                names[user_id] = name
+            else:
+                missing.append(user_id)
+
+        if missing:
+            for user_id, name in await asyncio.gather(*(self._fetch(uid) for uid in missing)):
+                if name is not None:
+                    names[user_id] = name
+
+        return names
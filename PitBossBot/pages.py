@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+
+# ================= LEADERBOARD SEITEN =================
+#
+# Gerenderte Seiten werden pro (Board, Seite) gecacht. Eine neue Zeit
+# verschiebt nur die Ränge zwischen neuer und alter Position des Fahrers -
+# nur diese Seiten fliegen raus, alle anderen bekommen die neue Version.
+# get() vergleicht die Version: ändert ein Pfad das Board ohne invalidate,
+# gibt es nur einen Miss statt einer veralteten Seite.
+
+
+class PageCache:
+    def __init__(self, page_size=20, maxsize=1000, ttl=600):
+        self.page_size = page_size
+        self.maxsize = maxsize
+        self.ttl = ttl  # Namen können sich ändern -> nicht ewig cachen
+        self._pages = OrderedDict()  # { (key, page): (version, text, expires_at) }
+        self._by_key = {}  # { key: {page, ...} }
+        self.hits = 0
+        self.misses = 0
+
+    def page_of(self, rank):
+        return (rank - 1) // self.page_size
+
+    def page_count(self, entries):
+        return max(1, (entries + self.page_size - 1) // self.page_size)
+
+    def get(self, key, page, version):
+        entry = self._pages.get((key, page))
+        if entry is None or entry[2] < time.monotonic():
+            self.misses += 1
+            return None
+
+        if entry[0] != version:
+            # Board hat sich ohne invalidate geändert -> Seite veraltet
+            self._discard(key, page)
+            self.misses += 1
+            return None
+
+        self._pages.move_to_end((key, page))
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, page, version, text):
+        self._pages[(key, page)] = (version, text, time.monotonic() + self.ttl)
+        self._pages.move_to_end((key, page))
+        self._by_key.setdefault(key, set()).add(page)
+
+        while len(self._pages) > self.maxsize:
+            (old_key, old_page), _ = self._pages.popitem(last=False)
+            self._discard(old_key, old_page)
+
+    def _discard(self, key, page):
+        self._pages.pop((key, page), None)
+        pages = self._by_key.get(key)
+        if pages is not None:
+            pages.discard(page)
+            if not pages:
+                del self._by_key[key]
+
+    def invalidate(self, key, version, first_rank, last_rank=None):
+        """Nach einer Änderung (Board jetzt bei `version`): Seiten mit Rängen
+        first_rank..last_rank verwerfen (None = bis Ende), die übrigen auf die
+        neue Version heben - aber nur, wenn sie genau eine Version zurück sind."""
+        first = self.page_of(first_rank)
+        last = self.page_of(last_rank) if last_rank is not None else None
+
+        for page in list(self._by_key.get(key, ())):
+            old_version, text, expires_at = self._pages[(key, page)]
+            if (page >= first and (last is None or page <= last)) or old_version != version - 1:
+                self._discard(key, page)
+            else:
+                self._pages[(key, page)] = (version, text, expires_at)
+
+    def drop(self, key):
+        for page in list(self._by_key.get(key, ())):
+            self._discard(key, page)
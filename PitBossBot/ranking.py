@@ -0,0 +1,242 @@
+import math
+import random
+
+# ================= LEADERBOARD INDEX =================
+#
+# Indexierbare Skip-List: jeder Link kennt seine "Breite" (wie viele
+# Einträge er überspringt). Damit kosten Insert, Remove, Rang-Abfrage und
+# Zugriff per Position jeweils O(log n) statt jedes Mal neu zu sortieren.
+
+MAX_LEVELS = 20  # reicht für ~1 Mio. Einträge pro Track
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+_END = _Node((math.inf, ""), 0)  # größer als jeder echte Key
+
+
+class _SkipList:
+    def __init__(self):
+        self.size = 0
+        self.head = _Node(None, MAX_LEVELS)
+        self.head.next = [_END] * MAX_LEVELS
+
+    def insert(self, key):
+        chain = [None] * MAX_LEVELS
+        steps_at_level = [0] * MAX_LEVELS
+        node = self.head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        d = min(MAX_LEVELS, 1 - int(math.log(1.0 - random.random(), 2.0)))
+        new = _Node(key, d)
+        steps = 0
+        for level in range(d):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(d, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * MAX_LEVELS
+        node = self.head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def index(self, key):
+        """0-basierte Position von key."""
+        node = self.head
+        steps = 0
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key < key:
+                steps += node.width[level]
+                node = node.next[level]
+        if node.next[0].key != key:
+            raise KeyError(key)
+        return steps
+
+    def node_at(self, i):
+        node = self.head
+        i += 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def iter_from(self, start=0):
+        if start >= self.size:
+            return
+        node = self.node_at(max(start, 0))
+        while node is not _END:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    """Bestzeiten eines Tracks, sortiert gehalten.
+
+    Keys im Index sind (sekunden, user_id) - bei gleicher Zeit entscheidet
+    die User-ID, damit die Reihenfolge stabil bleibt.
+    """
+
+    def __init__(self, times=None):
+        self._times = {}  # { user_id: time_in_seconds }
+        self._index = _SkipList()
+        self.version = 0  # +1 bei jeder Änderung
+        self.last_change = None  # (erster, letzter) betroffener Rang, letzter None = bis Ende
+        for user_id, seconds in (times or {}).items():
+            self.submit(user_id, seconds)
+
+    def __len__(self):
+        return len(self._times)
+
+    def __contains__(self, user_id):
+        return user_id in self._times
+
+    def __iter__(self):
+        return self.range(0, len(self))
+
+    def time_of(self, user_id):
+        return self._times.get(user_id)
+
+    def submit(self, user_id, seconds):
+        """Neue Zeit eintragen. False wenn sie nicht schneller ist."""
+        old = self._times.get(user_id)
+        old_rank = None
+        if old is not None:
+            if seconds >= old:
+                return False
+            old_rank = self._index.index((old, user_id)) + 1
+            self._index.remove((old, user_id))
+
+        self._index.insert((seconds, user_id))
+        self._times[user_id] = seconds
+
+        # nur Ränge zwischen neuer und alter Position verschieben sich
+        self.version += 1
+        self.last_change = (self.rank(user_id), old_rank)
+        return True
+
+    def remove(self, user_id):
+        old = self._times.get(user_id)
+        if old is not None:
+            old_rank = self.rank(user_id)
+            del self._times[user_id]
+            self._index.remove((old, user_id))
+            self.version += 1
+            self.last_change = (old_rank, None)
+
+    def rank(self, user_id):
+        """Position 1..n, None wenn keine Zeit vorhanden."""
+        seconds = self._times.get(user_id)
+        if seconds is None:
+            return None
+        return self._index.index((seconds, user_id)) + 1
+
+    def best(self):
+        """(user_id, sekunden) von P1 oder None."""
+        if not self._times:
+            return None
+        seconds, user_id = self._index.head.next[0].key
+        return user_id, seconds
+
+    def gap_to_leader(self, user_id):
+        seconds = self._times.get(user_id)
+        if seconds is None:
+            return None
+        return seconds - self.best()[1]
+
+    def range(self, start, stop):
+        """Einträge [start, stop) als (user_id, sekunden), 0-basiert."""
+        stop = min(stop, len(self))
+        count = stop - start
+        for seconds, user_id in self._index.iter_from(start):
+            if count <= 0:
+                return
+            yield user_id, seconds
+            count -= 1
+
+    def top(self, n):
+        return list(self.range(0, n))
+
+    def to_dict(self):
+        return dict(self._times)
+
+
+class Standings:
+    """Punkte pro Fahrer, absteigend sortiert (gleiche Skip-List wie Leaderboard).
+
+    Keys im Index sind (-punkte, user_id), Änderungen kommen als Delta.
+    """
+
+    def __init__(self):
+        self._points = {}  # { user_id: punkte }
+        self._index = _SkipList()
+
+    def __len__(self):
+        return len(self._points)
+
+    def add(self, user_id, delta):
+        if not delta:
+            return
+        old = self._points.get(user_id)
+        if old is not None:
+            self._index.remove((-old, user_id))
+
+        new = (old or 0) + delta
+        if new:
+            self._index.insert((-new, user_id))
+            self._points[user_id] = new
+        else:
+            del self._points[user_id]
+
+    def points(self, user_id):
+        return self._points.get(user_id, 0)
+
+    def rank(self, user_id):
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self._index.index((-points, user_id)) + 1
+
+    def range(self, start, stop):
+        """Einträge [start, stop) als (user_id, punkte), 0-basiert."""
+        count = min(stop, len(self)) - start
+        for points, user_id in self._index.iter_from(start):
+            if count <= 0:
+                return
+            yield user_id, -points
+            count -= 1
+
+    def top(self, n):
+        return list(self.range(0, n))
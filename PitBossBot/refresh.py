@@ -0,0 +1,77 @@
+import asyncio
+
+# ================= BOARD REFRESH =================
+#
+# Statt bei jeder Hotlap sofort msg.edit aufzurufen, wird der Track nur als
+# "dirty" markiert. Pro Track läuft höchstens ein Task, der nach `window`
+# Sekunden einmal rendert. Kommt während des Renderns eine neue Zeit rein,
+# wird danach noch einmal gerendert - der letzte Stand landet also immer
+# auf dem Board.
+#
+# Wird auch für Race-Posts benutzt (RSVP-Klicks, Key = (guild_id, message_id)).
+
+
+class BoardRefresher:
+    def __init__(self, render, window=3.0):
+        self.render = render  # async def render(track)
+        self.window = window
+        self._dirty = set()
+        self._tasks = {}  # { track: asyncio.Task }
+        self.requested = 0
+        self.edits = 0
+
+    @property
+    def queue_depth(self):
+        return len(self._dirty)
+
+    @property
+    def edits_saved(self):
+        return max(0, self.requested - self.edits - len(self._dirty))
+
+    def mark_dirty(self, track):
+        self.requested += 1
+        self._dirty.add(track)
+
+        if track not in self._tasks:
+            self._tasks[track] = asyncio.create_task(self._run(track))
+
+    async def _render(self, track):
+        self._dirty.discard(track)
+        try:
+            await self.render(track)
+        except asyncio.CancelledError:
+            # abgebrochen (flush/Shutdown) -> gilt weiter als offen
+            self._dirty.add(track)
+            raise
+        except Exception as e:
+            print(f"❌ Leaderboard {track} konnte nicht aktualisiert werden: {e}")
+        self.edits += 1
+
+    async def _run(self, track):
+        try:
+            while track in self._dirty:
+                await asyncio.sleep(self.window)
+                if track in self._dirty:
+                    await self._render(track)
+        finally:
+            self._tasks.pop(track, None)
+
+    async def discard(self):
+        """Alles Offene verwerfen ohne zu rendern (Leader-Rolle verloren)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._dirty.clear()
+
+    async def flush(self):
+        """Alle offenen Boards sofort rendern (z.B. beim Shutdown)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        for track in list(self._dirty):
+            await self._render(track)
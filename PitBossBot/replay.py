@@ -0,0 +1,327 @@
+"""
+Offline-Replay des Event-Logs (data/<guild_id>/events.log, siehe events.py).
+
+- Stand komplett neu aufbauen, optional bis zu einem Zeitpunkt / einer seq,
+  und als data.json ausgeben (lässt sich als Guild-Ordner wieder einspielen)
+- Verlauf eines Fahrers (und Tracks) anzeigen - für Streitfälle
+- --trace: aufgezeichnete Commands/Slash/Buttons gegen den aktuellen Code
+  abspielen (fakediscord, wie bench.py) und die Laufzeiten vergleichen
+
+Nutzung:
+    python replay.py data/123/events.log
+    python replay.py data/123/events.log --until "2026-05-01 20:00" --out data.json
+    python replay.py data/123/events.log --user 4242 --track monza
+    python replay.py data/123/events.log --trace --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakediscord
+from bench import become_leader, load_bot, percentile
+from events import TRACE_OPS, apply_event, read_events, rebuild
+from fakediscord import FakeAPI, FakeChannel, FakeContext, FakeGuild, FakeInteraction, FakeMessage, FakeUser
+from laps import LapHistory
+from storage import empty_state
+
+
+def parse_until(text):
+    # Unix-Zeit oder "2026-05-01 20:00" (lokale Zeit)
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+
+def guild_id_of(path):
+    name = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return int(name) if name.isdigit() else 1
+
+
+def fmt_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ===== STAND =====
+
+def summary(state):
+    laps = state["laps"]
+    drivers = {user for times in laps.values() for user in times}
+    history = sum(len(LapHistory.from_json(columns)) for columns in state["history"].values()) + len(state["history_log"])
+    rsvps = sum(len(event["rsvp"]) for event in state["events"].values())
+    return (
+        f"{len(laps)} Tracks | {sum(len(t) for t in laps.values())} Bestzeiten | {len(drivers)} Fahrer | "
+        f"{history} Runden | {len(state['events'])} Races ({rsvps} RSVPs) | {len(state['messages'])} Boards"
+    )
+
+
+def rebuild_state(args):
+    start = time.perf_counter()
+    state = empty_state()
+    count = 0
+    last = None
+    for event in read_events(args.log, args.until, args.seq):
+        apply_event(state, event)
+        count += 1
+        last = event
+    elapsed = time.perf_counter() - start
+
+    print(f"{count} Events in {elapsed * 1000:.1f} ms ({count / max(elapsed, 1e-9):,.0f}/s)")
+    if last is not None:
+        print(f"Stand bei seq {last['seq']} ({fmt_ts(last['at'])})")
+    print(summary(state))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(state, f)
+        print(f"💾 {args.out} geschrieben")
+
+
+def audit_line(event, op, fields):
+    print(f"{event['seq']:>8}  {fmt_ts(event['at'])}  {op:<14} {json.dumps(fields, ensure_ascii=False)}")
+
+
+def audit_baseline(args, event):
+    # Stand von vor dem Log zusammenfassen (Bestzeit + Anzahl Runden pro Track)
+    state = event["state"]
+    laps = {}
+    for track, times in state["laps"].items():
+        if args.user in times and args.track in (None, track):
+            laps.setdefault(track, {})["best"] = times[args.user]
+    for track, columns in state["history"].items():
+        stats = LapHistory.from_json(columns).driver(args.user)
+        if stats is not None and args.track in (None, track):
+            laps.setdefault(track, {})["laps"] = len(stats.rows)
+    for track, user, _, _ in state["history_log"]:
+        if user == args.user and args.track in (None, track):
+            entry = laps.setdefault(track, {})
+            entry["laps"] = entry.get("laps", 0) + 1
+
+    print(f"ℹ️ Baseline bei seq {event['seq']}: Daten von vor dem Event-Log, nur Bestzeiten + Rundenanzahl, keine Einzelereignisse")
+    if laps:
+        audit_line(event, "baseline", laps)
+
+
+def audit(args):
+    # alles, was ein Fahrer getan hat bzw. was ihn betrifft
+    for event in read_events(args.log, args.until, args.seq):
+        if event["op"] == "baseline":
+            audit_baseline(args, event)
+            continue
+
+        if event["op"] == "import":
+            # Bulk-Import: eine Zeile pro Runde dieses Fahrers
+            if event.get("by") == args.user:
+                audit_line(event, "import", {"laps": len(event["laps"])})
+            for track, user, ms, ts in event["laps"]:
+                if user == args.user and args.track in (None, track):
+                    audit_line(event, "import", {"track": track, "time": ms / 1000, "ts": ts})
+            continue
+
+        if args.user not in (event.get("user"), event.get("by")):
+            continue
+        if args.track and event.get("track") not in (None, args.track):
+            continue
+        fields = {k: v for k, v in event.items() if k not in ("seq", "at", "op", "by", "state")}
+        audit_line(event, event["op"], fields)
+
+
+# ===== TRACE =====
+
+class TraceReplay:
+    def __init__(self, bot, api, guild_id, verbose=False):
+        self.bot = bot
+        self.verbose = verbose
+        self.api = api
+        self.guild = FakeGuild(guild_id)
+        self.channels = {}
+        self.recorded = defaultdict(list)
+        self.replayed = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def channel(self, channel_id):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = FakeChannel(self.api, self.guild, channel_id)
+        return channel
+
+    def message(self, channel_id, message_id):
+        # Board-/Race-Posts aus dem Stand gibt es offline nicht -> anlegen
+        channel = self.channel(channel_id)
+        message = channel.messages.get(int(message_id))
+        if message is None:
+            message = FakeMessage(self.api, channel, self.api.bot_user)
+            message.id = int(message_id)
+            channel.messages[message.id] = message
+        return message
+
+    def user(self, user_id):
+        user_id = int(user_id)
+        user = self.guild.members.get(user_id)
+        if user is None:
+            user = self.guild.members[user_id] = self.api.users[user_id] = FakeUser(user_id, f"Driver{user_id}")
+        return user
+
+    def value(self, value):
+        return self.user(value["id"]) if isinstance(value, dict) and "id" in value else value
+
+    def prepare(self, state):
+        for link in state["messages"].values():
+            self.message(link["channel_id"], link["message_id"])
+        for message_id, event in state["events"].items():
+            if event.get("channel_id"):
+                self.message(event["channel_id"], message_id)
+
+    def call_for(self, event):
+        bot = self.bot
+        user = self.user(event.get("by") or 0)
+        channel = self.channel(event["channel"])
+
+        if event["op"] == "command":
+            command = bot.bot.get_command(event["name"])
+            if command is None:
+                return None
+            ctx = FakeContext(self.api, channel, user, f"!{event['name']}", event["name"])
+            args = [self.value(arg) for arg in event["args"]]
+            kwargs = {key: self.value(value) for key, value in event["kwargs"].items()}
+            return command.callback(ctx, *args, **kwargs)
+
+        if event["op"] == "slash":
+            command = bot.bot.tree.get_command(event["name"])
+            if command is None:
+                return None
+            interaction = FakeInteraction(self.api, channel.post(user, f"/{event['name']}"), user)
+            kwargs = {key: self.value(value) for key, value in event["kwargs"].items()}
+            return command.callback(interaction, **kwargs)
+
+        if event["op"] == "button":
+            button = next(b for b in bot.rsvp_view.children if b.custom_id == f"pitboss:rsvp:{event['status']}")
+            interaction = FakeInteraction(self.api, self.message(event["channel"], event["message_id"]), user)
+            return button.callback(interaction)
+
+    async def run(self, trace):
+        for event in trace:
+            name = f"/{event['name']}" if event["op"] == "slash" else event.get("name", "rsvp")
+            coro = self.call_for(event)
+            if coro is None:
+                continue
+
+            token = fakediscord.current_command.set(name)
+            start = time.perf_counter()
+            try:
+                await coro
+            except Exception as e:
+                self.errors[name] += 1
+                if self.verbose:
+                    print(f"seq {event['seq']} {name}: {type(e).__name__}: {e}")
+            finally:
+                self.replayed[name].append(time.perf_counter() - start)
+                self.recorded[name].append(event["ms"] / 1000)
+                fakediscord.current_command.reset(token)
+
+        await self.bot.board_refresher.flush()
+        await self.bot.rsvp_refresher.flush()
+
+    def report(self):
+        print(f"\n{'command':<18}{'n':>6}{'prod p50':>11}{'prod p99':>11}{'neu p50':>11}{'neu p99':>11}{'Δp50':>8}{'errors':>8}")
+        for name in sorted(self.replayed):
+            prod, new = self.recorded[name], self.replayed[name]
+            prod_p50, new_p50 = percentile(prod, 50), percentile(new, 50)
+            delta = f"{(new_p50 - prod_p50) / prod_p50 * 100:+.0f}%" if prod_p50 > 0 else "-"
+            print(
+                f"{name:<18}{len(new):>6}"
+                f"{prod_p50 * 1000:>9.1f}ms{percentile(prod, 99) * 1000:>9.1f}ms"
+                f"{new_p50 * 1000:>9.1f}ms{percentile(new, 99) * 1000:>9.1f}ms"
+                f"{delta:>8}{self.errors[name]:>8}"
+            )
+
+
+def replay_trace(args):
+    events = list(read_events(args.log, args.until, args.seq))
+    trace = [event for event in events if event["op"] in TRACE_OPS]
+    if not trace:
+        print("Keine Trace-Einträge (command/slash/button) im Log.")
+        return
+
+    # Ausgangsstand = alles vor dem Start des ersten aufgezeichneten Commands
+    started = trace[0]["at"] - trace[0]["ms"] / 1000
+    seed = rebuild(event for event in events if event["at"] < started)
+    expected = rebuild(events)["laps"]
+    guild_id = guild_id_of(args.log)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data", str(guild_id)))
+        with open(os.path.join(workdir, "data", str(guild_id), "data.json"), "w") as f:
+            json.dump(seed, f)
+
+        bot = load_bot(workdir)
+        api = FakeAPI(args.latency, args.jitter, args.rate_limits, seed=1)
+        api.install(bot.bot)
+        bot.dispatcher.rate_limits = args.rate_limits
+
+        replay = TraceReplay(bot, api, guild_id, args.verbose)
+        replay.prepare(seed)
+
+        async def run():
+            await bot.setup_hook()
+            await become_leader(bot)
+
+            start = time.perf_counter()
+            await replay.run(trace)
+            elapsed = time.perf_counter() - start
+
+            print(f"{len(trace)} Trace-Einträge in {elapsed:.2f}s (Produktion: {trace[-1]['at'] - started:.1f}s)")
+            replay.report()
+
+            # gleicher Code-Pfad -> gleiche Bestzeiten wie in Produktion?
+            laps = {track: board.to_dict() for track, board in bot.guild_data(guild_id).leaderboards.items() if len(board)}
+            diff = sum(
+                1 for track in set(laps) | set(expected) for user in set(laps.get(track, {})) | set(expected.get(track, {}))
+                if laps.get(track, {}).get(user) != expected.get(track, {}).get(user)
+            )
+            print("\n✅ Bestzeiten identisch mit dem Log" if diff == 0 else f"\n⚠️ {diff} Bestzeiten weichen vom Log ab")
+
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
+
+        asyncio.run(run())
+        bot.guilds.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PitBoss Event-Log Replay")
+    parser.add_argument("log", help="Pfad zu data/<guild_id>/events.log")
+    parser.add_argument("--until", type=parse_until, help="Stand zu diesem Zeitpunkt (Unix-Zeit oder ISO)")
+    parser.add_argument("--seq", type=int, help="Stand nach dieser seq")
+    parser.add_argument("--out", help="rekonstruierten Stand als data.json schreiben")
+    parser.add_argument("--user", help="Verlauf eines Fahrers (User-ID)")
+    parser.add_argument("--track", help="mit --user: nur dieser Track")
+    parser.add_argument("--trace", action="store_true", help="Commands gegen den aktuellen Code abspielen")
+    parser.add_argument("--latency", type=float, default=0.0, help="--trace: simulierte API-Latenz")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limits", action="store_true", help="--trace: Discord-Limits simulieren")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    args.log = os.path.abspath(args.log)
+    if args.out:
+        args.out = os.path.abspath(args.out)
+
+    if args.trace:
+        replay_trace(args)
+    elif args.user:
+        audit(args)
+    else:
+        rebuild_state(args)
+
+
+if __name__ == "__main__":
+    main()
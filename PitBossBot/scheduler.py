@@ -0,0 +1,152 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+import uuid
+
+from storage import empty_state
+
+# ================= SCHEDULER =================
+#
+# Ein Loop für alle zeitgesteuerten Aufgaben (Nachrichten später löschen,
+# Race-Erinnerungen, RSVP schließen) statt einer schlafenden Coroutine pro
+# Aufgabe. Jobs liegen in einem Heap nach Fälligkeit (Unix-Zeit, damit sie
+# einen Neustart überleben) und im eigenen Journal (data/scheduler.*).
+#
+# Abgesagte Jobs bleiben im Heap liegen und werden beim Herausnehmen
+# übersprungen (nur noch nicht in self.jobs) - cancel ist dadurch O(1).
+#
+# Wie bei GuildData (guilds.py) wird vor jedem Schreiben `fence()` geprüft:
+# ein abgesetzter Leader schreibt nicht mehr ins gemeinsame Journal.
+
+
+class Scheduler:
+    def __init__(self, store, metrics=None, fence=None):
+        self.store = store
+        self.metrics = metrics
+        self.fence = fence
+        self.handlers = {}  # { kind: async def handler(job) }
+        self.jobs = {}      # { job_id: { kind, due, ...payload } }
+        self._heap = []     # (due, seq, job_id)
+        self._seq = itertools.count()
+        self._wake = None
+        self._task = None
+        self._running = set()  # gerade ausgeführte Handler
+
+    def handler(self, kind):
+        def register(func):
+            self.handlers[kind] = func
+            return func
+        return register
+
+    def load(self):
+        # kompletter Neuaufbau aus dem Journal (auch nach Leader-Wechsel)
+        self.jobs = {}
+        self._heap = []
+        os.makedirs(os.path.dirname(self.store.snapshot_path) or ".", exist_ok=True)
+        for job_id, job in self.store.load()["jobs"].items():
+            self._push(job_id, job)
+
+    def _push(self, job_id, job):
+        self.jobs[job_id] = job
+        heapq.heappush(self._heap, (job["due"], next(self._seq), job_id))
+
+        # neuer frühester Job -> Loop muss neu rechnen
+        if self._wake is not None and self._heap[0][2] == job_id:
+            self._wake.set()
+
+    def _journal(self, op, **fields):
+        if self.fence is not None and not self.fence():
+            if self.metrics is not None:
+                self.metrics.inc("fenced_writes_total")
+            print(f"⚠️ Scheduler: nicht mehr Leader, '{op}' verworfen")
+            return
+        if self.store.append(op, **fields):
+            self.store.compact({**empty_state(), "jobs": {k: dict(v) for k, v in self.jobs.items()}})
+
+    # ===== JOBS =====
+
+    def schedule(self, kind, due, **payload):
+        """Job anlegen; `due` = Unix-Zeit. Gibt die Job-ID zurück."""
+        job_id = uuid.uuid4().hex[:12]
+        job = {"kind": kind, "due": due, **payload}
+        self._push(job_id, job)
+        self._journal("job", id=job_id, job=job)
+        return job_id
+
+    def later(self, kind, delay, **payload):
+        return self.schedule(kind, time.time() + delay, **payload)
+
+    def cancel(self, job_id):
+        if self.jobs.pop(job_id, None) is not None:
+            self._journal("job_done", id=job_id)
+
+    def cancel_where(self, **match):
+        """Alle Jobs absagen, deren Payload zu `match` passt (z.B. message_id=...)."""
+        for job_id, job in list(self.jobs.items()):
+            if all(job.get(key) == value for key, value in match.items()):
+                self.cancel(job_id)
+
+    def pending(self, kind=None):
+        return sum(1 for job in self.jobs.values() if kind is None or job["kind"] == kind)
+
+    # ===== LOOP =====
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            # abgesagte Jobs vorne wegwerfen
+            while self._heap and self._heap[0][2] not in self.jobs:
+                heapq.heappop(self._heap)
+
+            self._wake.clear()
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                # schlafen bis zum nächsten Job oder bis ein früherer dazukommt
+                # (kein wait_for: das kann unter 3.11 ein cancel() verschlucken)
+                timer = None
+                if delay is not None:
+                    timer = asyncio.get_running_loop().call_later(delay, self._wake.set)
+                try:
+                    await self._wake.wait()
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+                continue
+
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+
+            # Handler laufen als kurze Tasks, damit ein langsamer API-Call
+            # die übrigen fälligen Jobs nicht aufhält
+            task = asyncio.get_running_loop().create_task(self._execute(job_id, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job_id, job):
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is not None:
+                await handler(job)
+            if self.metrics is not None:
+                self.metrics.inc("scheduler_jobs_total", kind=job["kind"])
+                self.metrics.observe("scheduler_lag_seconds", max(0.0, time.time() - job["due"]), kind=job["kind"])
+        except Exception as e:
+            print(f"❌ Job {job['kind']} fehlgeschlagen: {e}")
+        finally:
+            self.cancel(job_id)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
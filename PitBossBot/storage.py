@@ -0,0 +1,349 @@
+import json
+import os
+import queue
+import threading
+import time
+
+# ================= JOURNAL STORAGE =================
+#
+# data.json     = letzter Snapshot (kompletter Stand)
+# data.journal  = eine JSON-Zeile pro Änderung seit dem Snapshot
+#
+# Nicht alle Journal-Operationen sind idempotent: "laptime"/"import" hängen
+# Runden an history_log an, doppelt abgespielt wären es doppelte Runden.
+# Deshalb zählt jede Kompaktierung eine Generation hoch:
+#
+#   data.json     { ..., "generation": N }  enthält alles bis Generation N
+#   data.journal  erste Zeile { "op": "generation", "generation": N }
+#
+# Crash zwischen Snapshot-Rename und Journal-Truncate -> der Snapshot ist
+# schon bei N, das Journal noch bei N-1 (ohne Kopfzeile = 0). Beim Laden wird
+# so ein Journal übersprungen und neu angelegt, statt es doppelt abzuspielen.
+
+
+def empty_state():
+    return {"laps": {}, "history": {}, "history_log": [], "messages": {}, "events": {}, "settings": {}, "jobs": {}}
+
+
+def apply_record(state, record):
+    """Wendet einen Journal-Eintrag auf den State an."""
+    op = record.get("op")
+
+    if op == "lap":
+        state["laps"].setdefault(record["track"], {})[record["user"]] = record["time"]
+    elif op == "laptime":
+        # Runden seit dem Snapshot; die Spalten selbst baut laps.LapHistory
+        state["history_log"].append([record["track"], record["user"], record["ms"], record["ts"]])
+    elif op == "import":
+        # Bulk-Import als ein Eintrag: eine halb geschriebene Zeile wird beim
+        # Laden verworfen -> Import ist ganz oder gar nicht drin
+        for track, user, ms, ts in record["laps"]:
+            state["history_log"].append([track, user, ms, ts])
+            times = state["laps"].setdefault(track, {})
+            if user not in times or ms / 1000 < times[user]:
+                times[user] = ms / 1000
+    elif op == "board":
+        state["messages"][record["track"]] = {
+            key: record[key] for key in ("channel_id", "message_id", "slot") if key in record
+        }
+    elif op == "boards":
+        state["messages"].update(record["links"])
+    elif op == "board_removed":
+        state["messages"].pop(record["track"], None)
+    elif op == "event":
+        state["events"][record["message_id"]] = {**record["event"], "rsvp": {}}
+    elif op == "rsvp":
+        event = state["events"].get(record["message_id"])
+        if event is not None:
+            event["rsvp"][record["user"]] = record["status"]
+    elif op == "event_closed":
+        event = state["events"].get(record["message_id"])
+        if event is not None:
+            event["closed"] = True
+    elif op == "event_removed":
+        state["events"].pop(record["message_id"], None)
+    elif op == "setting":
+        state["settings"][record["key"]] = record["value"]
+    elif op == "job":
+        # nur im Journal des Schedulers (scheduler.py)
+        state["jobs"][record["id"]] = record["job"]
+    elif op == "job_done":
+        state["jobs"].pop(record["id"], None)
+
+
+def repair_tail(path):
+    """Nach einem Crash: halb geschriebene letzte Zeile abschneiden.
+
+    Sonst hängt "a" den nächsten Eintrag direkt an den Rest dran und er
+    geht beim Laden mit der kaputten Zeile verloren. Fehlt nur das Zeilenende,
+    wird es ergänzt (die Zeile selbst ist gültig).
+    """
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return
+
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+
+        # Anfang der letzten Zeile suchen (blockweise von hinten)
+        start = end
+        while start > 0:
+            block = min(start, 64 * 1024)
+            f.seek(start - block)
+            newline = f.read(block).rfind(b"\n")
+            if newline != -1:
+                start = start - block + newline + 1
+                break
+            start -= block
+
+        f.seek(start)
+        try:
+            json.loads(f.read())
+        except ValueError:
+            f.truncate(start)
+        else:
+            f.write(b"\n")
+
+
+class JournalStore:
+    def __init__(self, snapshot_path="data.json", journal_path="data.journal", compact_every=500, writer=None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self.writer = writer  # BackgroundWriter oder None (= direkt schreiben)
+        self.pending = 0  # Einträge im Journal seit letztem Snapshot
+        self.generation = 0  # Kompaktierungen (siehe oben), steht in Snapshot + Journal
+        self._journal = None
+
+    def load(self):
+        """Snapshot laden und Journal darüber abspielen."""
+        state = empty_state()
+        snapshot_generation = 0
+
+        try:
+            with open(self.snapshot_path, "r") as f:
+                data = json.load(f)
+            for key in state:
+                state[key] = data.get(key, state[key])
+            snapshot_generation = data.get("generation", 0)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            print(f"⚠️ {self.snapshot_path} beschädigt, starte nur mit Journal")
+
+        self.pending = 0
+        self.generation = snapshot_generation
+        journal_generation = 0
+        records = []
+        repair_tail(self.journal_path)
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # abgeschnittene letzte Zeile nach Crash -> ignorieren
+                        continue
+                    if record.get("op") == "generation":
+                        journal_generation = record["generation"]
+                    else:
+                        records.append(record)
+        except FileNotFoundError:
+            pass
+
+        if journal_generation < snapshot_generation:
+            # Crash nach dem Snapshot, vor dem Leeren: steckt schon im Snapshot
+            print(f"⚠️ {self.journal_path} ist älter als {self.snapshot_path}, wird verworfen")
+            self._truncate_journal(snapshot_generation)
+            self._journal.close()
+            self._journal = None
+            return state
+
+        for record in records:
+            apply_record(state, record)
+            self.pending += 1
+
+        return state
+
+    def append(self, op, **fields):
+        """Hängt eine Änderung ans Journal an.
+
+        Gibt True zurück, wenn genug Einträge gesammelt sind und ein
+        Snapshot (compact) fällig ist.
+        """
+        line = json.dumps({"op": op, **fields}) + "\n"
+
+        if self.writer is not None:
+            self.writer.submit(self, "lines", line)
+        else:
+            self._write_lines([line])
+        self.pending += 1
+
+        return self.pending >= self.compact_every
+
+    def compact(self, state):
+        """Schreibt einen vollständigen Snapshot und leert das Journal.
+
+        Mit Writer darf `state` danach nicht mehr verändert werden
+        (wird erst im Writer-Thread serialisiert) - also eine Kopie übergeben.
+        """
+        self.generation += 1
+        state = {**state, "generation": self.generation}
+        if self.writer is not None:
+            self.writer.submit(self, "snapshot", state)
+        else:
+            self._write_snapshot(state)
+        self.pending = 0
+
+    def _write_lines(self, lines):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a")
+
+        self._journal.write("".join(lines))
+        self._journal.flush()
+
+    def _sync(self):
+        if self._journal is not None:
+            os.fsync(self._journal.fileno())
+
+    def _write_snapshot(self, state):
+        # erst temp-Datei komplett schreiben, dann atomar umbenennen
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self._truncate_journal(state["generation"])
+
+    def _truncate_journal(self, generation):
+        # neues Journal beginnt mit seiner Generation
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, "w")
+        self._journal.write(json.dumps({"op": "generation", "generation": generation}) + "\n")
+        self._journal.flush()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+# ================= BACKGROUND WRITER =================
+#
+# Ein Thread für alle Stores: der Event-Loop legt nur Aufträge in die Queue.
+# Der Thread sammelt bis zu `flush_interval` Sekunden, schreibt dann alle
+# Journal-Zeilen pro Store in einem Rutsch (+ fsync) und Snapshots per
+# temp-Datei + os.replace. Die Reihenfolge der Queue bleibt erhalten, ein
+# Snapshot enthält also genau die Zeilen, die vor ihm eingereiht wurden.
+#
+# Der Thread ist ein Daemon (hängt nie das Beenden auf). Auf ihn verlässt
+# sich der letzte Flush aber nicht: close() schreibt, was er nicht mehr
+# geschafft hat, im aufrufenden Thread (Shutdown + atexit im Bot).
+
+
+class BackgroundWriter:
+    def __init__(self, flush_interval=1.0):
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="pitboss-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, store, kind, payload):
+        self._queue.put((store, kind, payload))
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Blockiert, bis alles bis hierhin auf der Platte ist."""
+        if not self._thread.is_alive():
+            self._drain()
+            return
+        done = threading.Event()
+        self._queue.put((None, "flush", done))
+        done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put((None, "stop", None))
+            self._thread.join()
+        # Thread ist nicht mehr da (Fehler, Interpreter-Ende) -> Rest selbst schreiben
+        self._drain()
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while batch[-1][1] not in ("flush", "stop"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            if not self._write(self._collect()):
+                return
+            self.batches += 1
+
+    def _write(self, batch):
+        """Einen Batch abarbeiten. False = "stop" war dabei."""
+        lines = {}  # { store: [line, ...] } - seit letztem Snapshot
+
+        def write_lines():
+            for store, pending in lines.items():
+                try:
+                    store._write_lines(pending)
+                    store._sync()
+                except OSError as e:
+                    print(f"❌ Journal {store.journal_path} nicht geschrieben: {e}")
+            lines.clear()
+
+        for store, kind, payload in batch:
+            if kind == "lines":
+                lines.setdefault(store, []).append(payload)
+            elif kind == "snapshot":
+                write_lines()
+                try:
+                    store._write_snapshot(payload)
+                except OSError as e:
+                    print(f"❌ Snapshot {store.snapshot_path} nicht geschrieben: {e}")
+            elif kind == "flush":
+                write_lines()
+                payload.set()
+            elif kind == "stop":
+                write_lines()
+                return False
+
+        write_lines()
+        return True
@@ -0,0 +1,126 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from championship import Championship
+from pages import PageCache
+from ranking import Leaderboard, Standings
+
+# Zufällige Änderungen gegen eine komplett neu sortierte Liste prüfen.
+# Zeiten aus einem kleinen Bereich -> viele Gleichstände (User-ID entscheidet).
+
+
+def random_change(rng, board, users=60):
+    """Zufällige Zeit oder Löschung. True, wenn sich das Board geändert hat."""
+    version = board.version
+    user_id = str(rng.randrange(users))
+    if rng.random() < 0.1:
+        board.remove(user_id)
+    else:
+        board.submit(user_id, rng.randint(900, 1000) / 10)
+    return board.version != version
+
+
+def sorted_entries(times):
+    return [(user_id, seconds) for seconds, user_id in sorted((s, u) for u, s in times.items())]
+
+
+def test_leaderboard_matches_full_sort():
+    rng = random.Random(1)
+    board = Leaderboard()
+
+    for _ in range(2000):
+        before = list(board)
+        if not random_change(rng, board):
+            continue
+        expected = sorted_entries(board.to_dict())
+
+        assert len(board) == len(expected)
+        assert list(board) == expected
+        start = rng.randrange(len(expected) + 1)
+        assert list(board.range(start, start + 7)) == expected[start:start + 7]
+        assert board.top(10) == expected[:10]
+        assert board.best() == (expected[0] if expected else None)
+        for rank, (user_id, _) in enumerate(expected, 1):
+            assert board.rank(user_id) == rank
+
+        # außerhalb von last_change hat sich kein Rang bewegt
+        first, last = board.last_change
+        for i in range(len(expected)):
+            if i + 1 < first or (last is not None and i + 1 > last):
+                assert expected[i] == before[i]
+
+
+def test_page_cache_never_serves_stale_pages():
+    rng = random.Random(2)
+    cache = PageCache(page_size=5)
+    board = Leaderboard()
+
+    def render(page):
+        return repr(list(board.range(page * 5, page * 5 + 5)))
+
+    for _ in range(2000):
+        if random_change(rng, board):
+            cache.invalidate("monza", board.version, *board.last_change)
+
+        for page in range(cache.page_count(len(board))):
+            text = cache.get("monza", page, board.version)
+            if text is not None:
+                assert text == render(page)
+            elif rng.random() < 0.7:
+                cache.put("monza", page, board.version, render(page))
+
+
+def test_page_cache_misses_after_skipped_invalidate():
+    cache = PageCache(page_size=5)
+    board = Leaderboard({str(i): 100 + i for i in range(20)})
+    cache.put("monza", 3, board.version, "alt")
+
+    board.submit("19", 99.0)  # ohne invalidate
+    assert cache.get("monza", 3, board.version) is None
+
+
+def test_standings_match_full_sort():
+    rng = random.Random(3)
+    standings = Standings()
+    points = {}
+
+    for _ in range(2000):
+        user_id = str(rng.randrange(40))
+        delta = rng.randint(-10, 25)
+        standings.add(user_id, delta)
+        points[user_id] = points.get(user_id, 0) + delta
+        if not points[user_id]:
+            del points[user_id]
+
+        expected = [(u, -p) for p, u in sorted((-p, u) for u, p in points.items())]
+        assert len(standings) == len(expected)
+        assert standings.top(10) == expected[:10]
+        assert list(standings.range(5, 15)) == expected[5:15]
+        for rank, (user_id, value) in enumerate(expected, 1):
+            assert standings.rank(user_id) == rank
+            assert standings.points(user_id) == value
+
+
+def test_championship_incremental_matches_rebuild():
+    rng = random.Random(4)
+    tracks = ("monza", "spa", "imola")
+    boards = {track: Leaderboard() for track in tracks}
+    championship = Championship("overall")
+    subset = Championship("sprint", points=[3, 2, 1], tracks=["spa"])
+
+    for _ in range(2000):
+        track = rng.choice(tracks)
+        board = boards[track]
+        if not random_change(rng, board, users=25):
+            continue
+        championship.update(track, board, board.last_change[0])
+        subset.update(track, board, board.last_change[0])
+
+        for incremental in (championship, subset):
+            fresh = Championship(incremental.name, incremental.points, incremental.tracks)
+            fresh.rebuild(boards)
+            assert incremental.standings.top(len(fresh.standings)) == fresh.standings.top(len(fresh.standings))
+            assert len(incremental.standings) == len(fresh.standings)
@@ -0,0 +1,110 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from events import EventLog, read_events
+from storage import JournalStore, empty_state
+
+
+def make_store(tmp_path):
+    return JournalStore(str(tmp_path / "data.json"), str(tmp_path / "data.journal"))
+
+
+def test_append_after_torn_line(tmp_path):
+    store = make_store(tmp_path)
+    store.append("lap", track="monza", user="1", time=100.0)
+    store.close()
+
+    # Crash mitten im Schreiben
+    with open(tmp_path / "data.journal", "a") as f:
+        f.write('{"op": "lap", "track": "monza", "us')
+
+    store = make_store(tmp_path)
+    store.load()
+    store.append("lap", track="spa", user="1", time=120.0)
+    store.close()
+
+    state = make_store(tmp_path).load()
+    assert state["laps"] == {"monza": {"1": 100.0}, "spa": {"1": 120.0}}
+
+
+def test_crash_between_snapshot_and_truncate(tmp_path):
+    store = make_store(tmp_path)
+    store.load()
+    store.append("laptime", track="monza", user="1", ms=100000, ts=1)
+    store.append("lap", track="monza", user="1", time=100.0)
+
+    # Crash nach os.replace des Snapshots, bevor das Journal geleert wird
+    def crash(generation):
+        raise OSError("crash")
+
+    store._truncate_journal = crash
+    state = {**empty_state(), "laps": {"monza": {"1": 100.0}}, "history_log": [["monza", "1", 100000, 1]]}
+    with pytest.raises(OSError):
+        store.compact(state)
+    store._journal.close()
+
+    store = make_store(tmp_path)
+    assert store.load()["history_log"] == [["monza", "1", 100000, 1]]
+
+    # Journal wurde neu angelegt -> neue Einträge zählen wieder
+    store.append("laptime", track="spa", user="1", ms=120000, ts=2)
+    store.close()
+    assert make_store(tmp_path).load()["history_log"] == [["monza", "1", 100000, 1], ["spa", "1", 120000, 2]]
+
+
+def test_compact_then_append(tmp_path):
+    store = make_store(tmp_path)
+    store.load()
+    store.append("laptime", track="monza", user="1", ms=100000, ts=1)
+    store.compact({**empty_state(), "history_log": [["monza", "1", 100000, 1]]})
+    store.append("laptime", track="monza", user="1", ms=99000, ts=2)
+    store.close()
+
+    assert make_store(tmp_path).load()["history_log"] == [["monza", "1", 100000, 1], ["monza", "1", 99000, 2]]
+
+
+def test_complete_line_without_newline_is_kept(tmp_path):
+    with open(tmp_path / "data.journal", "w") as f:
+        f.write('{"op": "lap", "track": "monza", "user": "1", "time": 100.0}')
+
+    store = make_store(tmp_path)
+    store.load()
+    store.append("lap", track="spa", user="1", time=120.0)
+    store.close()
+
+    state = make_store(tmp_path).load()
+    assert state["laps"] == {"monza": {"1": 100.0}, "spa": {"1": 120.0}}
+
+
+def test_event_log_after_torn_line(tmp_path):
+    path = str(tmp_path / "events.log")
+    log = EventLog(path)
+    log.append("lap", track="monza", user="1", time=100.0)
+    log.close()
+
+    with open(path, "a") as f:
+        f.write('{"op": "lap", "seq": 2, "tr')
+
+    log = EventLog(path)
+    log.load()
+    log.append("lap", track="spa", user="1", time=120.0)
+    log.close()
+
+    assert [(e["seq"], e["track"]) for e in read_events(path)] == [(1, "monza"), (2, "spa")]
+
+
+def test_event_log_seq_after_large_line(tmp_path):
+    path = str(tmp_path / "events.log")
+    log = EventLog(path)
+    log.append("lap", track="monza", user="1", time=100.0)
+    # größer als das erste Lesefenster am Dateiende
+    log.append("baseline", state={"laps": {"monza": {str(i): 100.0 + i for i in range(20000)}}})
+    log.close()
+
+    log = EventLog(path)
+    log.load()
+    assert log.seq == 2
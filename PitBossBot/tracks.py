@@ -0,0 +1,181 @@
+import json
+import re
+import unicodedata
+
+# ================= TRACK KATALOG =================
+#
+# Alle Track-Lookups laufen über einen vorab kompilierten Index:
+#   1. exakter Alias               "cota"        -> circuit of the americas
+#   2. normalisiert / ohne Akzente "Nurburgring" -> nürburgring
+#   3. eindeutiger Prefix          "silv"        -> silverstone
+#   4. Trigramme (nur Vorschläge)  "monzza"      -> "Meintest du: Monza?"
+#
+# Für Slash-Autocomplete zusätzlich ein Prefix-Index ab dem 1. Zeichen und
+# ab jedem Wortanfang ("glen" -> watkins glen), fertig sortiert + gekürzt.
+
+MAX_CHOICES = 25  # Discord-Limit für Autocomplete
+
+# Die Tracks selbst stehen in tracks.json:
+#   { "tracks": { "monza": { "image": "https://...", "aliases": ["..."] } } }
+# Neuer DLC-Track = Eintrag ergänzen + !reload_tracks, kein Neustart.
+
+
+def normalize(text):
+    """Kleinschreibung + einfache Leerzeichen - so stehen Tracks/Aliase im Index."""
+    return " ".join(text.lower().split())
+
+
+def fold(text):
+    """Kleinschreibung, Akzente weg, nur Buchstaben/Zahlen + einfache Leerzeichen."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrackCatalog:
+    def __init__(self, images, aliases, min_prefix=3):
+        self.images = {}   # { canonical: image_url }
+        self._exact = {}   # { alias (lower): canonical }
+        self._folded = {}  # { fold(alias): canonical }
+        self._prefix = {}  # { prefix: {canonical, ...} }
+        self._grams = {}   # { trigram: {folded_key, ...} }
+        self._gram_count = {}
+        self._complete = {}  # { prefix: (canonical, ...) } - max. MAX_CHOICES
+
+        for name, url in images.items():
+            self.images[normalize(name)] = url
+
+        # Ziel der Aliase genauso normalisieren, sonst gäbe es "Brands Hatch"
+        # und "brands hatch" als zwei Tracks (zwei Leaderboards)
+        names = {name: name for name in self.images}
+        for alias, canonical in aliases.items():
+            names[normalize(alias)] = normalize(canonical)
+
+        for alias, canonical in names.items():
+            key = fold(alias)
+            self._exact[alias] = canonical
+            self._folded[key] = canonical
+
+            for i in range(min_prefix, len(key) + 1):
+                self._prefix.setdefault(key[:i], set()).add(canonical)
+
+            grams = trigrams(key)
+            self._gram_count[key] = len(grams)
+            for gram in grams:
+                self._grams.setdefault(gram, set()).add(key)
+
+            words = key.split(" ")
+            for w in range(len(words)):
+                tail = " ".join(words[w:])
+                for i in range(1, len(tail) + 1):
+                    self._complete.setdefault(tail[:i], set()).add(canonical)
+
+        self._complete = {
+            prefix: tuple(sorted(found)[:MAX_CHOICES]) for prefix, found in self._complete.items()
+        }
+        self._all = tuple(sorted(self.images)[:MAX_CHOICES])
+
+        # für race: Track irgendwo im Freitext finden (längste Aliase zuerst)
+        keys = sorted(self._folded, key=len, reverse=True)
+        self._search = re.compile(r"\b(" + "|".join(re.escape(k) for k in keys) + r")\b")
+
+    @classmethod
+    def from_file(cls, path):
+        """Katalog aus tracks.json bauen. ValueError bei kaputter Datei."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        entries = data.get("tracks")
+        if not isinstance(entries, dict) or not entries:
+            raise ValueError("'tracks' fehlt oder ist leer")
+
+        images = {}
+        aliases = {}
+        for key, entry in entries.items():
+            if not isinstance(entry, dict):
+                raise ValueError(f"Eintrag für '{key}' ist kein Objekt")
+            name = normalize(key)  # "Brands Hatch" von Hand eingetragen -> "brands hatch"
+            if name in images:
+                raise ValueError(f"Track '{key}' doppelt")
+            images[name] = entry.get("image")
+            for alias in entry.get("aliases", []):
+                other = aliases.get(normalize(alias))
+                if other is not None and other != name:
+                    raise ValueError(f"Alias '{alias}' doppelt ({other} / {name})")
+                aliases[normalize(alias)] = name
+
+        return cls(images, aliases)
+
+    def names(self):
+        return list(self.images)
+
+    def image(self, canonical):
+        return self.images.get(canonical)
+
+    def resolve(self, text):
+        """Canonical Trackname oder None."""
+        text = normalize(text)
+        if text in self._exact:
+            return self._exact[text]
+
+        key = fold(text)
+        if key in self._folded:
+            return self._folded[key]
+
+        candidates = self._prefix.get(key)
+        if candidates and len(candidates) == 1:
+            return next(iter(candidates))
+
+        return None
+
+    def find_in(self, text):
+        """Ersten bekannten Track in einem Freitext finden."""
+        track = self.resolve(text)
+        if track:
+            return track
+
+        match = self._search.search(fold(text))
+        return self._folded[match.group(1)] if match else None
+
+    def complete(self, text):
+        """Tracks für Autocomplete (nur Dict-Lookups, keine Schleife über alle)."""
+        key = fold(text)
+        if not key:
+            return list(self._all)
+
+        found = self._complete.get(key)
+        if found:
+            return list(found)
+
+        # Tippfehler -> ähnliche Tracks
+        return self.suggest(text, limit=MAX_CHOICES)
+
+    def suggest(self, text, limit=3):
+        """Ähnlichste Tracks (Trigramm-Jaccard) für "Meintest du ...?"."""
+        key = fold(text)
+        if not key:
+            return []
+
+        query = trigrams(key)
+        shared = {}
+        for gram in query:
+            for candidate in self._grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        best = {}
+        for candidate, hits in shared.items():
+            score = hits / (len(query) + self._gram_count[candidate] - hits)
+            canonical = self._folded[candidate]
+            if score >= 0.2 and score > best.get(canonical, 0):
+                best[canonical] = score
+
+        # mehrdeutige Prefix-Treffer auch anbieten
+        for canonical in self._prefix.get(key, ()):
+            best.setdefault(canonical, 1.0)
+
+        return sorted(best, key=lambda c: -best[c])[:limit]